@@ -0,0 +1,33 @@
+"""chat message count
+
+Revision ID: 4b7e2c91d3a0
+Revises: 089d90d51586
+Create Date: 2026-10-17 10:12:04.512391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2c91d3a0'
+down_revision: Union[str, Sequence[str], None] = '089d90d51586'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chats', sa.Column('message_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE chats SET message_count = counts.total "
+        "FROM (SELECT chat_id, count(*) AS total FROM messages GROUP BY chat_id) AS counts "
+        "WHERE chats.id = counts.chat_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('chats', 'message_count')
@@ -0,0 +1,48 @@
+"""chat summaries
+
+Revision ID: a91f5d27c804
+Revises: 7e3a9f04b2c1
+Create Date: 2026-10-17 14:20:55.871402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a91f5d27c804'
+down_revision: Union[str, Sequence[str], None] = '7e3a9f04b2c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('chat_summaries',
+    sa.Column('chat_id', sa.Integer(), nullable=False),
+    sa.Column('last_message_id', sa.Integer(), nullable=True),
+    sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_sender_id', sa.Integer(), nullable=True),
+    sa.Column('preview', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['chat_id'], ['chats.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['last_message_id'], ['messages.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['last_sender_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('chat_id')
+    )
+    op.create_index('ix_chat_summaries_last_message_at', 'chat_summaries', ['last_message_at'], unique=False)
+
+    # Backfill from the latest message of every chat (uses ix_messages_chat_id_created_at_id).
+    op.execute(
+        "INSERT INTO chat_summaries (chat_id, last_message_id, last_message_at, last_sender_id, preview) "
+        "SELECT DISTINCT ON (chat_id) chat_id, id, created_at, sender_id, left(content, 100) "
+        "FROM messages WHERE chat_id IS NOT NULL "
+        "ORDER BY chat_id, created_at DESC, id DESC"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chat_summaries_last_message_at', table_name='chat_summaries')
+    op.drop_table('chat_summaries')
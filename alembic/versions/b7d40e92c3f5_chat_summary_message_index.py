@@ -0,0 +1,48 @@
+"""chat summary last message index
+
+Revision ID: b7d40e92c3f5
+Revises: f3a85c1d6e49
+Create Date: 2026-10-17 19:40:12.358214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d40e92c3f5'
+down_revision: Union[str, Sequence[str], None] = 'f3a85c1d6e49'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Deleting a message checks chat_summaries.last_message_id (ON DELETE SET NULL);
+    # without an index every deleted row scans the whole table.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_chat_summaries_last_message_id', 'chat_summaries', ['last_message_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.drop_index(
+            'ix_chat_summaries_last_message_at', table_name='chat_summaries',
+            postgresql_concurrently=True, if_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_chat_summaries_last_message_at', 'chat_summaries', ['last_message_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.drop_index(
+            'ix_chat_summaries_last_message_id', table_name='chat_summaries',
+            postgresql_concurrently=True, if_exists=True
+        )
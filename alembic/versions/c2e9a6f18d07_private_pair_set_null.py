@@ -0,0 +1,37 @@
+"""private chat pair keys set null on user delete
+
+Revision ID: c2e9a6f18d07
+Revises: b7d40e92c3f5
+Create Date: 2026-10-17 19:58:31.604187
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e9a6f18d07'
+down_revision: Union[str, Sequence[str], None] = 'b7d40e92c3f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _recreate_pair_foreign_keys(ondelete: str) -> None:
+    for column in ('private_low_user_id', 'private_high_user_id'):
+        name = f'chats_{column}_fkey'
+        op.drop_constraint(name, 'chats', type_='foreignkey')
+        op.create_foreign_key(name, 'chats', 'users', [column], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created from e6c3f1b07a58 before it was corrected still have
+    # ON DELETE CASCADE, which deletes the whole private chat with either user.
+    _recreate_pair_foreign_keys('SET NULL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recreate_pair_foreign_keys('CASCADE')
@@ -0,0 +1,53 @@
+"""hot query indexes
+
+Revision ID: c5d18a3f6e27
+Revises: 4b7e2c91d3a0
+Create Date: 2026-10-17 11:03:47.190284
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d18a3f6e27'
+down_revision: Union[str, Sequence[str], None] = '4b7e2c91d3a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_messages_chat_id_created_at_id', 'messages', ['chat_id', 'created_at', 'id'], False),
+    ('uq_chat_participants_chat_id_user_id', 'chat_participants', ['chat_id', 'user_id'], True),
+    ('ix_chat_participants_user_id', 'chat_participants', ['user_id'], False),
+    ('ix_friendships_receiver_id_status', 'friendships', ['receiver_id', 'status'], False),
+    ('ix_friendships_sender_id_status', 'friendships', ['sender_id', 'status'], False),
+    ('ix_events_chat_id', 'events', ['chat_id'], False),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Duplicate memberships would make the unique index fail; keep the oldest row.
+    op.execute(
+        "DELETE FROM chat_participants a USING chat_participants b "
+        "WHERE a.chat_id = b.chat_id AND a.user_id = b.user_id AND a.id > b.id"
+    )
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.create_index(
+                name, table, columns,
+                unique=unique,
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,42 @@
+"""chat participant read marker
+
+Revision ID: d2b64e8a1f93
+Revises: a91f5d27c804
+Create Date: 2026-10-17 15:08:31.602715
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b64e8a1f93'
+down_revision: Union[str, Sequence[str], None] = 'a91f5d27c804'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chat_participants', sa.Column('last_read_message_id', sa.Integer(), nullable=True))
+    # Existing history counts as read, otherwise every badge would light up at once.
+    op.execute(
+        "UPDATE chat_participants SET last_read_message_id = chat_summaries.last_message_id "
+        "FROM chat_summaries WHERE chat_summaries.chat_id = chat_participants.chat_id"
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_chat_id_id', 'messages', ['chat_id', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_messages_chat_id_id', table_name='messages', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('chat_participants', 'last_read_message_id')
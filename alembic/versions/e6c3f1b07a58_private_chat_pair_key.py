@@ -0,0 +1,60 @@
+"""private chat pair key
+
+Revision ID: e6c3f1b07a58
+Revises: d2b64e8a1f93
+Create Date: 2026-10-17 15:52:14.118930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6c3f1b07a58'
+down_revision: Union[str, Sequence[str], None] = 'd2b64e8a1f93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chats', sa.Column('private_low_user_id', sa.Integer(), nullable=True))
+    op.add_column('chats', sa.Column('private_high_user_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(None, 'chats', 'users', ['private_low_user_id'], ['id'], ondelete='SET NULL')
+    op.create_foreign_key(None, 'chats', 'users', ['private_high_user_id'], ['id'], ondelete='SET NULL')
+
+    # Backfill private chats with exactly two members. If a pair already has
+    # several DMs, the oldest one gets the key; the rest keep their history.
+    op.execute(
+        "UPDATE chats SET private_low_user_id = pairs.low_id, private_high_user_id = pairs.high_id "
+        "FROM ("
+        "  SELECT DISTINCT ON (low_id, high_id) chat_id, low_id, high_id FROM ("
+        "    SELECT cp.chat_id, min(cp.user_id) AS low_id, max(cp.user_id) AS high_id "
+        "    FROM chat_participants cp JOIN chats c ON c.id = cp.chat_id "
+        "    WHERE NOT c.is_group "
+        "    GROUP BY cp.chat_id HAVING count(*) = 2"
+        "  ) AS private_chats "
+        "  ORDER BY low_id, high_id, chat_id"
+        ") AS pairs "
+        "WHERE chats.id = pairs.chat_id"
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_chats_private_pair', 'chats', ['private_low_user_id', 'private_high_user_id'],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_chats_private_pair', table_name='chats', postgresql_concurrently=True, if_exists=True)
+    op.drop_constraint('chats_private_high_user_id_fkey', 'chats', type_='foreignkey')
+    op.drop_constraint('chats_private_low_user_id_fkey', 'chats', type_='foreignkey')
+    op.drop_column('chats', 'private_high_user_id')
+    op.drop_column('chats', 'private_low_user_id')
@@ -0,0 +1,65 @@
+"""friendship pair key
+
+Revision ID: f3a85c1d6e49
+Revises: e6c3f1b07a58
+Create Date: 2026-10-17 18:21:47.503112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a85c1d6e49'
+down_revision: Union[str, Sequence[str], None] = 'e6c3f1b07a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep one row per unordered pair: accepted over pending over rejected,
+    # then the oldest request.
+    op.execute(
+        "DELETE FROM friendships USING ("
+        "  SELECT id, row_number() OVER ("
+        "    PARTITION BY LEAST(sender_id, receiver_id), GREATEST(sender_id, receiver_id) "
+        "    ORDER BY CASE status WHEN 'ACCEPTED' THEN 0 WHEN 'PENDING' THEN 1 ELSE 2 END, id"
+        "  ) AS position FROM friendships"
+        ") AS ranked "
+        "WHERE friendships.id = ranked.id AND ranked.position > 1"
+    )
+
+    op.add_column('friendships', sa.Column(
+        'low_user_id', sa.Integer(), sa.Computed('LEAST(sender_id, receiver_id)', persisted=True), nullable=True
+    ))
+    op.add_column('friendships', sa.Column(
+        'high_user_id', sa.Integer(), sa.Computed('GREATEST(sender_id, receiver_id)', persisted=True), nullable=True
+    ))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_friendships_pair', 'friendships', ['low_user_id', 'high_user_id'],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.create_index(
+            'ix_friendships_high_user_id_low_user_id', 'friendships', ['high_user_id', 'low_user_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_friendships_high_user_id_low_user_id', table_name='friendships',
+            postgresql_concurrently=True, if_exists=True
+        )
+        op.drop_index('uq_friendships_pair', table_name='friendships', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('friendships', 'high_user_id')
+    op.drop_column('friendships', 'low_user_id')
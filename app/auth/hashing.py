@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+
+class PasswordHasher:
+    """Выполняет bcrypt в отдельном пуле потоков, не блокируя цикл событий.
+
+    bcrypt отпускает GIL, поэтому потоков достаточно. Если в очереди уже
+    ``max_queue`` задач, новые запросы сразу получают 503. Задача занимает
+    место в очереди, пока bcrypt не завершится, даже если запрос отменен.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queued = 0
+        self.running = 0
+        self.rejected = 0
+        self._running_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def _run(self, func: Callable[..., Any], *args) -> Any:
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, try again later"
+            )
+
+        self.queued += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self._call, func, args)
+        # Колбэк выполняется в цикле событий, когда поток закончил работу;
+        # shield не дает отмене запроса освободить место раньше
+        future.add_done_callback(self._release)
+        return await asyncio.shield(future)
+
+    def _release(self, future: asyncio.Future):
+        self.queued -= 1
+
+    def _call(self, func: Callable[..., Any], args: tuple) -> Any:
+        with self._running_lock:
+            self.running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._running_lock:
+                self.running -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """Проверяет пароль; если стоимость хэша устарела, возвращает новый хэш"""
+        return await self._run(pwd_context.verify_and_update, password, hashed_password)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queue_depth": max(self.queued - self.running, 0),
+            "max_queue": self.max_queue,
+            "rejected": self.rejected
+        }
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
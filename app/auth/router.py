@@ -1,9 +1,11 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.service import create_user, login_user
+from app.core.config import settings
 from app.core.database import get_db
 from app.auth.schemas import UserSchema
+from app.core.rate_limit import TokenBucketLimiter, client_ip, rate_limit_backend
 from app.core.security import create_access_token
 
 router = APIRouter(
@@ -11,7 +13,23 @@ router = APIRouter(
     tags=["Auth"]
 )
 
-@router.post("/register", status_code=status.HTTP_201_CREATED)
+ip_limiter = TokenBucketLimiter(
+    rate_limit_backend, "auth-ip",
+    capacity=settings.AUTH_RATE_LIMIT_IP_CAPACITY,
+    per_minute=settings.AUTH_RATE_LIMIT_IP_PER_MINUTE
+)
+email_limiter = TokenBucketLimiter(
+    rate_limit_backend, "auth-email",
+    capacity=settings.AUTH_RATE_LIMIT_EMAIL_CAPACITY,
+    per_minute=settings.AUTH_RATE_LIMIT_EMAIL_PER_MINUTE
+)
+
+async def limit_auth_attempts(request: Request, user_data: UserSchema):
+    # Отсекаем перебор до обращения к БД и bcrypt
+    await ip_limiter.check(client_ip(request))
+    await email_limiter.check(str(user_data.email).lower())
+
+@router.post("/register", status_code=status.HTTP_201_CREATED, dependencies=[Depends(limit_auth_attempts)])
 async def register(user_data: UserSchema, db: AsyncSession = Depends(get_db)):
     user = await create_user(db, user_data.email, user_data.password)
 
@@ -20,7 +38,7 @@ async def register(user_data: UserSchema, db: AsyncSession = Depends(get_db)):
         "user_id": user.id
     }
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(limit_auth_attempts)])
 async def login(user_data: UserSchema, db: AsyncSession = Depends(get_db)):
     user = await login_user(db, user_data.email, user_data.password)
     access_token = create_access_token({"sub": str(user.id), "role": user.role})
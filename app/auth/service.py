@@ -1,21 +1,19 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from fastapi import HTTPException, status
-from passlib.context import CryptContext
 import logging
 from pydantic import EmailStr
 
+from app.auth.hashing import password_hasher
 from app.models import User
 
 logger = logging.getLogger(__name__)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+async def verify_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await password_hasher.verify_and_update(plain_password, hashed_password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
 
 async def create_user(db: AsyncSession, email: EmailStr, password: str):
 
@@ -28,7 +26,7 @@ async def create_user(db: AsyncSession, email: EmailStr, password: str):
             detail="User with this username or email already exists"
         )
 
-    hashed_password = get_hash_password(password)
+    hashed_password = await get_hash_password(password)
 
     user = User(email=str(email), password=hashed_password)
 
@@ -50,10 +48,17 @@ async def login_user(db: AsyncSession, email: EmailStr, password: str):
             detail="Invalid email or password"
         )
 
-    if not verify_password(password, user.password):
+    is_valid, new_hash = await verify_password(password, user.password)
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid email or password"
         )
 
+    # Стоимость bcrypt изменилась - перехэшируем пароль прозрачно для пользователя
+    if new_hash:
+        logger.info(f"Rehashing password for user {user.id}")
+        user.password = new_hash
+        await db.commit()
+
     return user
\ No newline at end of file
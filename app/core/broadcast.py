@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Callable
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[[int, dict[str, Any]], None]
+
+# Ограничение PostgreSQL на размер payload в NOTIFY
+NOTIFY_PAYLOAD_LIMIT = 8000
+# Столько id участников помещается в одно событие с запасом до лимита NOTIFY
+MEMBERS_PER_EVENT = 500
+
+
+class BroadcastBackend(ABC):
+    """Рассылка событий чатов между воркерами.
+
+    ``publish`` отправляет событие всем процессам, каждый процесс передает
+    полученное событие своим локальным слушателям (хабу WebSocket и т.д.).
+    """
+
+    def __init__(self):
+        self._listeners: list[Listener] = []
+
+    def add_listener(self, listener: Listener):
+        self._listeners.append(listener)
+
+    def _deliver(self, chat_id: int, event: dict[str, Any]):
+        for listener in self._listeners:
+            try:
+                listener(chat_id, event)
+            except Exception:
+                logger.exception("Broadcast listener failed")
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, chat_id: int, event: dict[str, Any]):
+        ...
+
+    async def publish_members(self, chat_id: int, event_type: str, user_ids: list[int]):
+        """``member.added``/``member.removed``: хабы обновляют подписки этих пользователей"""
+        for start in range(0, len(user_ids), MEMBERS_PER_EVENT):
+            await self.publish(chat_id, {
+                "type": event_type,
+                "chat_id": chat_id,
+                "user_ids": user_ids[start:start + MEMBERS_PER_EVENT]
+            })
+
+    async def publish_chat_deleted(self, chat_id: int):
+        await self.publish(chat_id, {"type": "chat.deleted", "chat_id": chat_id})
+
+
+class MemoryBroadcast(BroadcastBackend):
+    """Бэкенд для одного процесса: событие сразу уходит локальным слушателям"""
+
+    async def publish(self, chat_id: int, event: dict[str, Any]):
+        self._deliver(chat_id, event)
+
+
+class PostgresBroadcast(BroadcastBackend):
+    """Бэкенд на LISTEN/NOTIFY поверх существующего ``engine``, без отдельного брокера.
+
+    Соединение с LISTEN проверяется раз в ``healthcheck_interval`` секунд и
+    при обрыве (рестарт Postgres, сетевой сбой) переподключается; события,
+    отправленные во время обрыва, теряются.
+    """
+
+    def __init__(self, channel: str, healthcheck_interval: float):
+        super().__init__()
+        self.channel = channel
+        self.healthcheck_interval = healthcheck_interval
+        self._connection = None
+        self._driver_connection = None
+        self._lost = asyncio.Event()
+        self._watchdog: asyncio.Task | None = None
+
+    async def connect(self):
+        await self._listen()
+        self._watchdog = asyncio.create_task(self._watch())
+
+    async def disconnect(self):
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            try:
+                await self._watchdog
+            except asyncio.CancelledError:
+                pass
+            self._watchdog = None
+        await self._close_listener()
+
+    async def _listen(self):
+        self._connection = await engine.connect()
+        raw_connection = await self._connection.get_raw_connection()
+        self._driver_connection = raw_connection.driver_connection
+        await self._driver_connection.add_listener(self.channel, self._on_notify)
+        self._driver_connection.add_termination_listener(self._on_terminate)
+        logger.info(f"Listening on Postgres channel {self.channel}")
+
+    async def _close_listener(self):
+        connection, self._connection, self._driver_connection = self._connection, None, None
+        if connection is None:
+            return
+        # Соединение с LISTEN не возвращается в пул: иначе подписка на канал
+        # осталась бы на соединении, которое получат обычные запросы
+        try:
+            await connection.invalidate()
+            await connection.close()
+        except Exception:
+            logger.warning(f"Failed to close LISTEN connection on channel {self.channel}", exc_info=True)
+
+    def _on_terminate(self, connection):
+        self._lost.set()
+
+    async def _is_alive(self) -> bool:
+        try:
+            # Запрос напрямую через asyncpg, вне транзакции: в открытой
+            # транзакции Postgres задерживает доставку NOTIFY
+            await asyncio.wait_for(self._driver_connection.execute("SELECT 1"), self.healthcheck_interval)
+            return True
+        except Exception:
+            return False
+
+    async def _watch(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._lost.wait(), self.healthcheck_interval)
+            except asyncio.TimeoutError:
+                if await self._is_alive():
+                    continue
+
+            logger.error(f"Lost LISTEN connection on Postgres channel {self.channel}, reconnecting")
+            self._lost.clear()
+            await self._close_listener()
+
+            delay = 1.0
+            while True:
+                try:
+                    await self._listen()
+                    break
+                except Exception:
+                    logger.exception(f"Failed to reconnect to Postgres channel {self.channel}, retry in {delay:.0f}s")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.healthcheck_interval)
+
+    async def publish(self, chat_id: int, event: dict[str, Any]):
+        # Событие публикуется после commit: ошибка NOTIFY не должна превращать
+        # уже сохраненное изменение в 500, иначе клиент повторит запрос
+        payload = self._encode(chat_id, event)
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": self.channel, "payload": payload}
+                )
+        except Exception:
+            logger.exception("Failed to publish event for chat %s", chat_id)
+
+    @staticmethod
+    def _encode(chat_id: int, event: dict[str, Any]) -> str:
+        payload = json.dumps({"chat_id": chat_id, "event": event}, separators=(",", ":"))
+        if len(payload.encode()) <= NOTIFY_PAYLOAD_LIMIT:
+            return payload
+
+        # Слишком большое сообщение: отправляем только идентификаторы,
+        # клиент дочитает содержимое через GET /message/{id}
+        message = event["message"]
+        compact = {
+            "type": event["type"],
+            "message": {"id": message["id"], "chat_id": message["chat_id"]},
+            "truncated": True
+        }
+        return json.dumps({"chat_id": chat_id, "event": compact}, separators=(",", ":"))
+
+    def _on_notify(self, connection, pid, channel, payload):
+        data = json.loads(payload)
+        self._deliver(data["chat_id"], data["event"])
+
+
+def create_broadcast(backend: str) -> BroadcastBackend:
+    if backend == "memory":
+        return MemoryBroadcast()
+    if backend == "postgres":
+        return PostgresBroadcast(settings.BROADCAST_CHANNEL, settings.BROADCAST_HEALTHCHECK_SECONDS)
+    raise ValueError(f"Unknown broadcast backend: {backend}")
+
+
+broadcast = create_broadcast(settings.BROADCAST_BACKEND)
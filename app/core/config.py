@@ -7,6 +7,36 @@ class Settings(BaseSettings):
     JWT_SECRET: str = "supersecretkey"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
+    WS_QUEUE_SIZE: int = 100
+    BROADCAST_BACKEND: str = "memory"
+    BROADCAST_CHANNEL: str = "qasynda_messages"
+    BROADCAST_HEALTHCHECK_SECONDS: int = 30
+    MESSAGE_BATCH_ENABLED: bool = False
+    MESSAGE_BATCH_SIZE: int = 200
+    MESSAGE_BATCH_INTERVAL_MS: int = 5
+    IMPORT_CHUNK_SIZE: int = 10000
+    EXPORT_BATCH_SIZE: int = 1000
+    CHAT_PREVIEW_LENGTH: int = 100
+    UNREAD_COUNT_CAP: int = 100
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    TRUSTED_PROXY_HOPS: int = 0
+    AUTH_RATE_LIMIT_IP_CAPACITY: int = 20
+    AUTH_RATE_LIMIT_IP_PER_MINUTE: int = 20
+    AUTH_RATE_LIMIT_EMAIL_CAPACITY: int = 5
+    AUTH_RATE_LIMIT_EMAIL_PER_MINUTE: int = 5
+    MEMBERSHIP_CACHE_SIZE: int = 100000
+    MEMBERSHIP_CACHE_TTL_SECONDS: int = 60
+    FRIEND_CACHE_SIZE: int = 10000
+    FRIEND_CACHE_TTL_SECONDS: int = 60
+    FRIEND_GRAPH_ENABLED: bool = True
+    FRIEND_GRAPH_REFRESH_SECONDS: int = 300
+    FRIEND_SUGGESTION_FANOUT: int = 1000
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from typing import Any, Iterable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Очередь событий одного соединения.
+
+    Очередь ограничена: если клиент не успевает читать, подписка помечается
+    переполненной и соединение закрывается, остальные клиенты не ждут его.
+    """
+
+    def __init__(self, user_id: int, maxsize: int):
+        self.user_id = user_id
+        self.chat_ids: set[int] = set()
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def push(self, event: dict[str, Any]):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # Будим читателя, чтобы он увидел переполнение и закрыл соединение
+            self.queue.get_nowait()
+            self.queue.put_nowait({"type": "overflow"})
+
+
+class ChatHub:
+    """Внутрипроцессная рассылка событий чатов, ключ - chat_id.
+
+    Подписки следят за составом чатов: события ``member.added``,
+    ``member.removed`` и ``chat.deleted`` добавляют и снимают чаты у открытых
+    подписок затронутых пользователей.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._users: dict[int, set[Subscription]] = {}
+        # Для long-poll: событие текущего "поколения" и число ожидающих по чату
+        self._new_message: dict[int, asyncio.Event] = {}
+        self._waiters: dict[int, int] = {}
+
+    def new_message_event(self, chat_id: int) -> asyncio.Event:
+        """Событие, которое будет установлено при следующем новом сообщении в чате.
+
+        Его нужно получить до проверочного запроса в БД, иначе сообщение,
+        пришедшее между запросом и ожиданием, будет пропущено. Полученное
+        событие держит ссылку на чат до вызова ``release_message_event``.
+        """
+        self._waiters[chat_id] = self._waiters.get(chat_id, 0) + 1
+        return self._new_message.setdefault(chat_id, asyncio.Event())
+
+    def release_message_event(self, chat_id: int, event: asyncio.Event):
+        # Событие удаляется, только когда его больше никто не держит
+        self._waiters[chat_id] -= 1
+        if not self._waiters[chat_id]:
+            del self._waiters[chat_id]
+            if self._new_message.get(chat_id) is event:
+                del self._new_message[chat_id]
+
+    async def wait_for_message(self, event: asyncio.Event, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _notify_new_message(self, chat_id: int):
+        event = self._new_message.pop(chat_id, None)
+        if event is not None:
+            event.set()
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Подписка пользователя; чаты добавляются через ``attach``.
+
+        Подписку нужно создать до выборки чатов пользователя, чтобы не
+        пропустить изменения состава, пришедшие между выборкой и подпиской.
+        """
+        subscription = Subscription(user_id, self.queue_size)
+        self._users.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def attach(self, subscription: Subscription, chat_ids: Iterable[int]):
+        for chat_id in chat_ids:
+            subscription.chat_ids.add(chat_id)
+            self._subscribers.setdefault(chat_id, set()).add(subscription)
+
+    def detach(self, subscription: Subscription, chat_ids: Iterable[int]):
+        for chat_id in chat_ids:
+            subscription.chat_ids.discard(chat_id)
+            subscribers = self._subscribers.get(chat_id)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[chat_id]
+
+    def unsubscribe(self, subscription: Subscription):
+        self.detach(subscription, tuple(subscription.chat_ids))
+
+        subscriptions = self._users.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._users[subscription.user_id]
+
+    def _user_subscriptions(self, user_ids: Iterable[int]) -> list[Subscription]:
+        return [subscription for user_id in user_ids for subscription in self._users.get(user_id, ())]
+
+    def publish(self, chat_id: int, event: dict[str, Any]):
+        event_type = event["type"]
+        if event_type == "message.created":
+            self._notify_new_message(chat_id)
+        elif event_type == "member.added":
+            # Новые участники получают и само событие, и все следующие
+            for subscription in self._user_subscriptions(event["user_ids"]):
+                self.attach(subscription, (chat_id,))
+
+        for subscription in tuple(self._subscribers.get(chat_id, ())):
+            subscription.push(event)
+            if subscription.overflowed:
+                logger.warning(f"Slow WebSocket consumer dropped from chat {chat_id}")
+                self.unsubscribe(subscription)
+
+        # Удаленные участники узнают об удалении и больше ничего не получают
+        if event_type == "member.removed":
+            for subscription in self._user_subscriptions(event["user_ids"]):
+                self.detach(subscription, (chat_id,))
+        elif event_type == "chat.deleted":
+            for subscription in tuple(self._subscribers.get(chat_id, ())):
+                self.detach(subscription, (chat_id,))
+
+
+hub = ChatHub(settings.WS_QUEUE_SIZE)
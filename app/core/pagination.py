@@ -0,0 +1,31 @@
+import base64
+import binascii
+
+from fastapi import HTTPException, status
+
+
+def pack_cursor(*parts) -> str:
+    """Упаковывает позицию keyset-пагинации в непрозрачный курсор"""
+    raw = "|".join(str(part) for part in parts).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def unpack_cursor(cursor: str, size: int) -> list[str]:
+    """Распаковывает курсор в ``size`` строковых частей, иначе 400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        parts = base64.urlsafe_b64decode(padded).decode().split("|")
+    except (binascii.Error, UnicodeDecodeError):
+        parts = []
+
+    if len(parts) != size:
+        raise invalid_cursor()
+
+    return parts
+
+
+def invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor"
+    )
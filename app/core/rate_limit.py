@@ -0,0 +1,104 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+
+
+class RateLimitBackend(ABC):
+    """Хранилище корзин токенов.
+
+    ``take`` списывает токен с корзины ``key`` и возвращает 0, если запрос
+    разрешен, иначе - сколько секунд ждать следующего токена. Для общего
+    хранилища между воркерами достаточно реализовать этот метод.
+    """
+
+    @abstractmethod
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        ...
+
+    def stats(self) -> dict[str, Any]:
+        return {}
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Корзины в памяти процесса; при превышении ``max_keys`` вытесняются давно не использованные"""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+
+        if tokens >= 1:
+            tokens -= 1
+            retry_after = 0.0
+        else:
+            retry_after = (1 - tokens) / refill_per_second
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        return retry_after
+
+    def stats(self) -> dict[str, Any]:
+        return {"keys": len(self._buckets), "max_keys": self.max_keys}
+
+
+def client_ip(request: Request) -> str:
+    """Адрес клиента с учетом ``TRUSTED_PROXY_HOPS`` доверенных прокси.
+
+    Каждый прокси дописывает адрес, от которого получил запрос, в конец
+    X-Forwarded-For, поэтому клиент - ``TRUSTED_PROXY_HOPS``-я запись справа;
+    записи левее мог подставить сам клиент.
+    """
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops > 0:
+        forwarded = [
+            address.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for address in header.split(",")
+            if address.strip()
+        ]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else "unknown"
+
+
+class TokenBucketLimiter:
+    def __init__(self, backend: RateLimitBackend, name: str, capacity: float, per_minute: float):
+        self.backend = backend
+        self.name = name
+        self.capacity = capacity
+        self.refill_per_second = per_minute / 60
+        self.rejected = 0
+
+    async def check(self, key: str):
+        retry_after = await self.backend.take(f"{self.name}:{key}", self.capacity, self.refill_per_second)
+        if retry_after:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, try again later",
+                headers={"Retry-After": str(max(1, round(retry_after)))}
+            )
+
+    def stats(self) -> dict[str, Any]:
+        return {"capacity": self.capacity, "rejected": self.rejected}
+
+
+def create_rate_limit_backend(backend: str) -> RateLimitBackend:
+    if backend == "memory":
+        return MemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+rate_limit_backend = create_rate_limit_backend(settings.RATE_LIMIT_BACKEND)
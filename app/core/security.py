@@ -2,14 +2,40 @@ from datetime import datetime, timedelta, UTC
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, event, inspect
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.database import get_db
 from app.models import User
+from app.models.enums import UserRole
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Кэш пользователей по id: хранит только значения колонок, а не объекты сессии
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+class TokenClaims(BaseModel):
+    """Пользователь по данным токена, без обращения к БД"""
+    id: int
+    role: UserRole
+
+
+def invalidate_user(user_id: int):
+    user_cache.invalidate(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    invalidate_user(target.id)
+
+
+def _cache_user(user: User):
+    user_cache.set(user.id, {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
     expire = datetime.now(UTC) + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -24,25 +50,65 @@ def verify_access_token(token: str):
     except JWTError:
         return None
 
-async def get_current_user(token: str = Depends(oauth2_scheme),db: AsyncSession = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
+def _user_id_from_token(token: str) -> int | None:
     payload = verify_access_token(token)
     if payload is None:
-        raise credentials_exception
-    
+        return None
+
     user_id: str = payload.get("sub")
     if user_id is None:
-        raise credentials_exception
-    
-    result = await db.execute(select(User).where(User.id == int(user_id)))
+        return None
+
+    return int(user_id)
+
+async def get_user_from_token(db: AsyncSession, token: str) -> User | None:
+    user_id = _user_id_from_token(token)
+    if user_id is None:
+        return None
+
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        # Каждый запрос получает свой несвязанный с сессией объект
+        return User(**cached)
+
+    result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
-    
+
+    if user is not None:
+        _cache_user(user)
+
+    return user
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+async def get_current_user(token: str = Depends(oauth2_scheme),db: AsyncSession = Depends(get_db)) -> User:
+    credentials_exception = _credentials_exception()
+
+    user = await get_user_from_token(db, token)
+
     if user is None:
         raise credentials_exception
     
     return user
+
+async def get_current_user_claims(token: str = Depends(oauth2_scheme)) -> TokenClaims:
+    """Только данные из токена: для маршрутов, которым нужен лишь id пользователя"""
+    payload = verify_access_token(token)
+    if payload is None or payload.get("sub") is None:
+        raise _credentials_exception()
+
+    return TokenClaims(id=int(payload["sub"]), role=payload.get("role", UserRole.USER))
+
+async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+
+    return current_user
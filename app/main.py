@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import logging
 
@@ -5,18 +6,41 @@ from app.auth.router import router as auth_router
 from app.routers.friendship_router import router as friendship_router
 from app.routers.chat_router import router as chat_router
 from app.routers.message_router import router as message_router
+from app.routers.ws_router import router as ws_router
 from app.routers.event_router import router as event_router
+from app.routers.admin_router import router as admin_router
+from app.core.broadcast import broadcast
+from app.core.hub import hub
+from app.core.config import settings
+from app.services.message_batcher import message_batcher
+from app.services.friend_graph import friend_graph
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    broadcast.add_listener(hub.publish)
+    await broadcast.connect()
+    if settings.MESSAGE_BATCH_ENABLED:
+        await message_batcher.start()
+    if settings.FRIEND_GRAPH_ENABLED:
+        await friend_graph.start()
+    yield
+    await friend_graph.stop()
+    await message_batcher.stop()
+    await broadcast.disconnect()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(auth_router)
 app.include_router(friendship_router)
 app.include_router(chat_router)
 app.include_router(message_router)
+app.include_router(ws_router)
 app.include_router(event_router)
+app.include_router(admin_router)
 
 @app.get("/")
 def read_root():
@@ -4,3 +4,4 @@ from app.models.message import Message
 from app.models.chat_participant import ChatParticipant
 from app.models.event import Event
 from app.models.friendship import Friendship
+from app.models.chat_summary import ChatSummary
@@ -1,15 +1,23 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
 
 class Chat(Base):
     __tablename__ = 'chats'
+    __table_args__ = (
+        Index("uq_chats_private_pair", "private_low_user_id", "private_high_user_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
     title = Column(String)
     is_group = Column(Boolean, default=False, nullable=False)
+    message_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # Канонический ключ приватного чата: (min(user_id), max(user_id)), у групп пустой
+    private_low_user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    private_high_user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
 
     event = relationship("Event", back_populates="chat", uselist=False)
     messages = relationship("Message", back_populates="chat", cascade="all, delete-orphan")
-    participants = relationship("ChatParticipant", back_populates="chat", cascade="all, delete-orphan")
\ No newline at end of file
+    participants = relationship("ChatParticipant", back_populates="chat", cascade="all, delete-orphan")
+    summary = relationship("ChatSummary", back_populates="chat", uselist=False, cascade="all, delete-orphan")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Enum as SqlEnum
+from sqlalchemy import Column, Integer, ForeignKey, Index, Enum as SqlEnum
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -7,11 +7,15 @@ from app.models.enums import ChatParticipantRole
 
 class ChatParticipant(Base):
     __tablename__ = 'chat_participants'
+    __table_args__ = (
+        Index("uq_chat_participants_chat_id_user_id", "chat_id", "user_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
     chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"))
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
     role = Column(SqlEnum(ChatParticipantRole), default=ChatParticipantRole.PARTICIPANT, nullable=False)
+    last_read_message_id = Column(Integer)
 
     chat = relationship("Chat", back_populates="participants")
     user = relationship("User")
\ No newline at end of file
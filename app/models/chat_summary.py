@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, ForeignKey, String, DateTime, Index
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+
+
+class ChatSummary(Base):
+    __tablename__ = 'chat_summaries'
+    __table_args__ = (
+        # Для проверки внешнего ключа при удалении сообщений
+        Index("ix_chat_summaries_last_message_id", "last_message_id"),
+    )
+
+    chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"), primary_key=True)
+    last_message_id = Column(Integer, ForeignKey("messages.id", ondelete="SET NULL"))
+    last_message_at = Column(DateTime(timezone=True))
+    last_sender_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    preview = Column(String)
+
+    chat = relationship("Chat", back_populates="summary")
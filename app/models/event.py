@@ -11,6 +11,6 @@ class Event(Base):
     description = Column(Text)
     creator_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
     start_time = Column(DateTime)
-    chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"))
+    chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"), index=True)
 
     chat = relationship("Chat", back_populates="event", uselist=False)
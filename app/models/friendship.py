@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Enum as SqlEnum
+from sqlalchemy import Column, Integer, ForeignKey, Index, Computed, Enum as SqlEnum
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -7,11 +7,20 @@ from app.models.enums import FriendshipStatus
 
 class Friendship(Base):
     __tablename__ = 'friendships'
+    __table_args__ = (
+        Index("ix_friendships_receiver_id_status", "receiver_id", "status"),
+        Index("ix_friendships_sender_id_status", "sender_id", "status"),
+        Index("uq_friendships_pair", "low_user_id", "high_user_id", unique=True),
+        Index("ix_friendships_high_user_id_low_user_id", "high_user_id", "low_user_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     receiver_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     status = Column(SqlEnum(FriendshipStatus), default=FriendshipStatus.PENDING)
+    # Канонический ключ пары: одна строка на пару независимо от направления заявки
+    low_user_id = Column(Integer, Computed("LEAST(sender_id, receiver_id)", persisted=True))
+    high_user_id = Column(Integer, Computed("GREATEST(sender_id, receiver_id)", persisted=True))
 
     sender = relationship("User", foreign_keys=[sender_id])
     receiver = relationship("User", foreign_keys=[receiver_id])
\ No newline at end of file
@@ -1,18 +1,29 @@
-from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime, UTC
 
 from app.core.database import Base
 
+# Конфигурация без стемминга: сообщения пишут на разных языках
+SEARCH_CONFIG = "simple"
+
 
 class Message(Base):
     __tablename__ = 'messages'
+    __table_args__ = (
+        Index("ix_messages_chat_id_created_at_id", "chat_id", "created_at", "id"),
+        Index("ix_messages_chat_id_id", "chat_id", "id"),
+        Index("ix_messages_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id = Column(Integer, primary_key=True)
     chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"))
     sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    # Не загружается вместе с сообщением, нужен только для поиска
+    search_vector = deferred(Column(TSVECTOR, Computed(f"to_tsvector('{SEARCH_CONFIG}', content)", persisted=True)))
 
     chat = relationship("Chat", back_populates="messages")
     sender = relationship("User")
\ No newline at end of file
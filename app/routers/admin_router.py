@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+
+from app.auth.hashing import password_hasher
+from app.auth.router import ip_limiter, email_limiter
+from app.core.rate_limit import rate_limit_backend
+from app.core.security import get_current_admin, user_cache
+from app.services import membership_cache, friend_cache
+from app.services.friend_graph import friend_graph
+from app.models import User
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"]
+)
+
+
+@router.get("/stats")
+async def get_stats(current_user: User = Depends(get_current_admin)):
+    """Счетчики внутрипроцессных кэшей и очередей текущего воркера"""
+    return {
+        "user_cache": user_cache.stats(),
+        "membership_cache": membership_cache.stats(),
+        "friend_cache": friend_cache.stats(),
+        "friend_graph": friend_graph.stats(),
+        "password_hasher": password_hasher.stats(),
+        "auth_rate_limit": {
+            "backend": rate_limit_backend.stats(),
+            "ip": ip_limiter.stats(),
+            "email": email_limiter.stats()
+        }
+    }
@@ -1,17 +1,19 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from app.core.database import get_db
 from app.core.security import get_current_user
 from app.models import User
 from app.services import chat_service
 from app.services import chat_group_service
+from app.services.chat_access import ChatAccess, get_group_access, get_group_target_access
 from app.schemas.chat_schemas import (
     GroupCreateRequest,
     AddGroupMembersRequest,
     UpdateGroupTitleRequest,
     ChatResponse,
+    ChatListResponse,
     GroupMemberResponse
 )
 
@@ -22,14 +24,16 @@ router = APIRouter(
 
 
 # Chat service routes
-@router.get("", response_model=List[ChatResponse])
+@router.get("", response_model=ChatListResponse)
 async def get_user_chats(
+    limit: int = Query(50, ge=1, le=200, description="Максимальное количество чатов"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Получить список всех чатов текущего пользователя"""
-    chats = await chat_service.get_user_chats(db, current_user.id)
-    return chats
+    """Получить список чатов текущего пользователя одним запросом"""
+    result = await chat_service.get_user_chats(db, current_user.id, limit=limit, cursor=cursor)
+    return result
 
 
 @router.post("/private/{friend_id}", status_code=status.HTTP_201_CREATED, response_model=ChatResponse)
@@ -71,14 +75,14 @@ async def create_group(
 async def add_group_members(
     chat_id: int,
     members_data: AddGroupMembersRequest,
-    current_user: User = Depends(get_current_user),
+    access: ChatAccess = Depends(get_group_access),
     db: AsyncSession = Depends(get_db)
 ):
     """Добавить участников в группу"""
     added_ids = await chat_group_service.add_group_members(
         db=db,
         chat_id=chat_id,
-        added_by=current_user.id,
+        added_by=access.user_id,
         friend_ids=members_data.friend_ids
     )
     return {"added_user_ids": added_ids}
@@ -87,11 +91,11 @@ async def add_group_members(
 @router.get("/group/{chat_id}/members", response_model=List[GroupMemberResponse])
 async def get_group_members(
     chat_id: int,
-    current_user: User = Depends(get_current_user),
+    access: ChatAccess = Depends(get_group_access),
     db: AsyncSession = Depends(get_db)
 ):
     """Получить список участников группы"""
-    members = await chat_group_service.get_group_members(db, chat_id, current_user.id)
+    members = await chat_group_service.get_group_members(db, chat_id, access.user_id)
     return members
 
 
@@ -99,7 +103,7 @@ async def get_group_members(
 async def delete_group_member(
     chat_id: int,
     user_id: int,
-    current_user: User = Depends(get_current_user),
+    access: ChatAccess = Depends(get_group_target_access),
     db: AsyncSession = Depends(get_db)
 ):
     """Удалить участника из группы (только для админов и создателя)"""
@@ -107,7 +111,7 @@ async def delete_group_member(
         db=db,
         chat_id=chat_id,
         user_id=user_id,
-        removed_by=current_user.id
+        removed_by=access.user_id
     )
     return result
 
@@ -115,14 +119,14 @@ async def delete_group_member(
 @router.post("/group/{chat_id}/leave", status_code=status.HTTP_200_OK, response_model=dict)
 async def leave_group(
     chat_id: int,
-    current_user: User = Depends(get_current_user),
+    access: ChatAccess = Depends(get_group_access),
     db: AsyncSession = Depends(get_db)
 ):
     """Покинуть группу"""
     result = await chat_group_service.leave_group(
         db=db,
         chat_id=chat_id,
-        user_id=current_user.id
+        user_id=access.user_id
     )
     return result
 
@@ -131,7 +135,7 @@ async def leave_group(
 async def promote_to_admin(
     chat_id: int,
     user_id: int,
-    current_user: User = Depends(get_current_user),
+    access: ChatAccess = Depends(get_group_target_access),
     db: AsyncSession = Depends(get_db)
 ):
     """Повысить участника до админа (только для админов и создателя)"""
@@ -139,7 +143,7 @@ async def promote_to_admin(
         db=db,
         chat_id=chat_id,
         target_user_id=user_id,
-        requested_by=current_user.id
+        requested_by=access.user_id
     )
     return result
 
@@ -148,7 +152,7 @@ async def promote_to_admin(
 async def demote_to_participant(
     chat_id: int,
     user_id: int,
-    current_user: User = Depends(get_current_user),
+    access: ChatAccess = Depends(get_group_target_access),
     db: AsyncSession = Depends(get_db)
 ):
     """Понизить админа до участника (только для создателя)"""
@@ -156,7 +160,7 @@ async def demote_to_participant(
         db=db,
         chat_id=chat_id,
         target_user_id=user_id,
-        requested_by=current_user.id
+        requested_by=access.user_id
     )
     return result
 
@@ -165,7 +169,7 @@ async def demote_to_participant(
 async def update_group_title(
     chat_id: int,
     title_data: UpdateGroupTitleRequest,
-    current_user: User = Depends(get_current_user),
+    access: ChatAccess = Depends(get_group_access),
     db: AsyncSession = Depends(get_db)
 ):
     """Обновить название группы (только для админов и создателя)"""
@@ -173,7 +177,7 @@ async def update_group_title(
         db=db,
         chat_id=chat_id,
         new_title=title_data.title,
-        updated_by=current_user.id
+        updated_by=access.user_id
     )
     return result
 
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.core.database import get_db
 from app.core.security import get_current_user
-from app.models import User, Chat
+from app.models import User
 from app.services import event_service
 from app.schemas.event_schemas import (
     EventCreateRequest,
@@ -53,19 +53,8 @@ async def get_event_with_chat(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    from sqlalchemy import select
-    
-    event = await event_service.get_event(db, event_id, current_user.id)
-    
-    chat_result = await db.execute(select(Chat).where(Chat.id == event.chat_id))
-    chat = chat_result.scalar_one_or_none()
-    
-    if not chat:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Chat associated with event not found"
-        )
-    
+    event, chat = await event_service.get_event_with_chat(db, event_id, current_user.id)
+
     return EventWithChatResponse(
         event=EventResponse(
             id=event.id,
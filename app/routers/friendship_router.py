@@ -1,10 +1,13 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.security import get_current_user, get_current_user_claims, TokenClaims
 from app.models import User
 from app.services.friendship_service import send_request, update_request_status, get_friends, get_incoming_requests, \
-    delete_friend
+    delete_friend, get_mutual_friends, get_friend_suggestions, get_friendship_counts
+from app.schemas.friendship_schemas import MutualFriendsResponse, FriendSuggestionResponse, FriendListResponse, \
+    IncomingRequestListResponse, FriendshipCountResponse
+from typing import List, Optional
 from app.models.enums import FriendshipStatus
 
 router = APIRouter(
@@ -24,13 +27,44 @@ async def accept_friend_request(friendship_id: int, current_user: User = Depends
 async def reject_friend_request(friendship_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     return await update_request_status(db, friendship_id, current_user.id, FriendshipStatus.REJECTED)
 
-@router.get("")
-async def list_of_friends(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
-    return await get_friends(db, current_user.id)
+@router.get("", response_model=FriendListResponse)
+async def list_of_friends(
+    limit: int = Query(50, ge=1, le=200, description="Максимальное количество друзей"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    current_user: TokenClaims = Depends(get_current_user_claims),
+    db: AsyncSession = Depends(get_db)
+):
+    return await get_friends(db, current_user.id, limit=limit, cursor=cursor)
 
-@router.get("/incoming")
-async def list_of_incoming_requests(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
-    return await get_incoming_requests(db, current_user.id)
+@router.get("/incoming", response_model=IncomingRequestListResponse)
+async def list_of_incoming_requests(
+    limit: int = Query(50, ge=1, le=200, description="Максимальное количество заявок"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    current_user: TokenClaims = Depends(get_current_user_claims),
+    db: AsyncSession = Depends(get_db)
+):
+    return await get_incoming_requests(db, current_user.id, limit=limit, cursor=cursor)
+
+@router.get("/count", response_model=FriendshipCountResponse)
+async def count_of_friends(current_user: TokenClaims = Depends(get_current_user_claims), db: AsyncSession = Depends(get_db)):
+    return await get_friendship_counts(db, current_user.id)
+
+@router.get("/mutual/{user_id}", response_model=MutualFriendsResponse)
+async def list_of_mutual_friends(
+    user_id: int,
+    limit: int = Query(50, ge=1, le=500, description="Максимальное количество общих друзей в ответе"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await get_mutual_friends(db, current_user.id, user_id, limit=limit)
+
+@router.get("/suggestions", response_model=List[FriendSuggestionResponse])
+async def list_of_friend_suggestions(
+    limit: int = Query(20, ge=1, le=100, description="Максимальное количество рекомендаций"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await get_friend_suggestions(db, current_user.id, limit=limit)
 
 @router.delete("/remove/{friendship_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remove_friend(friendship_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
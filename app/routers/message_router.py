@@ -1,15 +1,23 @@
-from fastapi import APIRouter, Depends, status, Query
+from fastapi import APIRouter, Depends, status, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List
+import io
 
 from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.security import get_current_user_claims, get_current_admin, TokenClaims
 from app.models import User
 from app.services import message_service
+from app.services import message_import_service
+from app.services.chat_access import ChatAccess, get_chat_access
 from app.schemas.message_schemas import (
     MessageCreateRequest,
     MessageUpdateRequest,
     MessageResponse,
-    MessageListResponse
+    MessageListResponse,
+    MessageSearchResponse,
+    MessageReadRequest,
+    MessageReadResponse
 )
 
 router = APIRouter(
@@ -18,18 +26,39 @@ router = APIRouter(
 )
 
 
+@router.get("/search", response_model=MessageSearchResponse)
+async def search_messages(
+    q: str = Query(..., min_length=1, max_length=256, description="Поисковый запрос"),
+    chat_id: Optional[int] = Query(None, description="Искать только в указанном чате"),
+    limit: int = Query(20, ge=1, le=100, description="Максимальное количество сообщений"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    current_user: TokenClaims = Depends(get_current_user_claims),
+    db: AsyncSession = Depends(get_db)
+):
+    """Полнотекстовый поиск по сообщениям своих чатов"""
+    result = await message_service.search_messages(
+        db=db,
+        user_id=current_user.id,
+        query_text=q,
+        chat_id=chat_id,
+        limit=limit,
+        cursor=cursor
+    )
+    return result
+
+
 @router.post("/chat/{chat_id}", status_code=status.HTTP_201_CREATED, response_model=MessageResponse)
 async def send_message(
     chat_id: int,
     message_data: MessageCreateRequest,
-    current_user: User = Depends(get_current_user),
+    access: ChatAccess = Depends(get_chat_access),
     db: AsyncSession = Depends(get_db)
 ):
     """Отправить сообщение в чат"""
     message = await message_service.send_message(
         db=db,
         chat_id=chat_id,
-        sender_id=current_user.id,
+        sender_id=access.user_id,
         content=message_data.content
     )
     return message
@@ -38,26 +67,100 @@ async def send_message(
 @router.get("/chat/{chat_id}", response_model=MessageListResponse)
 async def get_chat_messages(
     chat_id: int,
-    skip: int = Query(0, ge=0, description="Количество пропущенных сообщений"),
+    skip: int = Query(0, ge=0, description="Количество пропущенных сообщений (устаревший режим)"),
     limit: int = Query(50, ge=1, le=100, description="Максимальное количество сообщений"),
-    current_user: User = Depends(get_current_user),
+    before: Optional[str] = Query(None, description="Курсор: сообщения старше указанного"),
+    after: Optional[str] = Query(None, description="Курсор: сообщения новее указанного"),
+    exact: bool = Query(False, description="Точный подсчет общего количества сообщений"),
+    access: ChatAccess = Depends(get_chat_access),
     db: AsyncSession = Depends(get_db)
 ):
     """Получить сообщения чата с пагинацией"""
     result = await message_service.get_chat_messages(
         db=db,
         chat_id=chat_id,
-        user_id=current_user.id,
+        user_id=access.user_id,
         skip=skip,
+        limit=limit,
+        before=before,
+        after=after,
+        exact=exact
+    )
+    return result
+
+
+@router.get("/chat/{chat_id}/since/{message_id}", response_model=List[MessageResponse])
+async def get_messages_since(
+    chat_id: int,
+    message_id: int,
+    wait: float = Query(0, ge=0, le=60, description="Сколько секунд ждать новых сообщений"),
+    limit: int = Query(50, ge=1, le=100, description="Максимальное количество сообщений"),
+    access: ChatAccess = Depends(get_chat_access),
+    db: AsyncSession = Depends(get_db)
+):
+    """Long-poll: получить сообщения новее указанного, дождавшись их при необходимости"""
+    messages = await message_service.get_messages_since(
+        db=db,
+        chat_id=chat_id,
+        user_id=access.user_id,
+        message_id=message_id,
+        wait=wait,
         limit=limit
     )
+    return messages
+
+
+@router.post("/chat/{chat_id}/read", response_model=MessageReadResponse)
+async def mark_chat_read(
+    chat_id: int,
+    read_data: Optional[MessageReadRequest] = None,
+    access: ChatAccess = Depends(get_chat_access),
+    db: AsyncSession = Depends(get_db)
+):
+    """Отметить сообщения чата прочитанными"""
+    result = await message_service.mark_chat_read(
+        db=db,
+        chat_id=chat_id,
+        user_id=access.user_id,
+        message_id=read_data.message_id if read_data else None
+    )
     return result
 
 
+@router.get("/chat/{chat_id}/export")
+async def export_chat_messages(
+    chat_id: int,
+    access: ChatAccess = Depends(get_chat_access),
+    db: AsyncSession = Depends(get_db)
+):
+    """Экспортировать всю историю чата в формате NDJSON"""
+    lines = await message_service.export_chat_messages(
+        db=db,
+        chat_id=chat_id,
+        user_id=access.user_id
+    )
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="chat-{chat_id}.ndjson"'}
+    )
+
+
+@router.post("/import", status_code=status.HTTP_200_OK)
+async def import_messages(
+    file: UploadFile = File(...),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Формат файла: ndjson или csv"),
+    current_user: User = Depends(get_current_admin)
+):
+    """Массовый импорт истории сообщений (только для администраторов)"""
+    text_file = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    return await message_import_service.import_messages(text_file, format)
+
+
 @router.get("/{message_id}", response_model=MessageResponse)
 async def get_message(
     message_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenClaims = Depends(get_current_user_claims),
     db: AsyncSession = Depends(get_db)
 ):
     """Получить одно сообщение по ID"""
@@ -73,7 +176,7 @@ async def get_message(
 async def update_message(
     message_id: int,
     message_data: MessageUpdateRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenClaims = Depends(get_current_user_claims),
     db: AsyncSession = Depends(get_db)
 ):
     """Обновить сообщение (только отправитель)"""
@@ -89,7 +192,7 @@ async def update_message(
 @router.delete("/{message_id}", status_code=status.HTTP_200_OK)
 async def delete_message(
     message_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenClaims = Depends(get_current_user_claims),
     db: AsyncSession = Depends(get_db)
 ):
     """Удалить сообщение (только отправитель)"""
@@ -0,0 +1,81 @@
+import asyncio
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.core.hub import hub
+from app.core.security import get_user_from_token
+from app.models import ChatParticipant
+
+router = APIRouter(
+    tags=["WebSocket"]
+)
+
+
+def _extract_token(websocket: WebSocket) -> str | None:
+    # Браузеры не умеют передавать заголовки в WebSocket, поэтому токен
+    # принимается и из query-параметра
+    token = websocket.query_params.get("token")
+    if token:
+        return token
+
+    authorization = websocket.headers.get("authorization", "")
+    scheme, _, credentials = authorization.partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        return credentials
+
+    return None
+
+
+async def _send_events(websocket: WebSocket, subscription):
+    while True:
+        event = await subscription.queue.get()
+        if event["type"] == "overflow":
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return
+        await websocket.send_json(event)
+
+
+async def _receive_until_disconnect(websocket: WebSocket):
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        return
+
+
+@router.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    """Получение новых, измененных и удаленных сообщений во всех чатах пользователя"""
+    token = _extract_token(websocket)
+
+    # Сессия нужна только на время авторизации, соединение с БД не удерживается
+    async with AsyncSessionLocal() as db:
+        user = await get_user_from_token(db, token) if token else None
+        if user is None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+        # Подписываемся до выборки чатов: изменения состава после нее придут событиями
+        subscription = hub.subscribe(user.id)
+        try:
+            result = await db.execute(
+                select(ChatParticipant.chat_id).where(ChatParticipant.user_id == user.id)
+            )
+        except Exception:
+            hub.unsubscribe(subscription)
+            raise
+        hub.attach(subscription, result.scalars().all())
+
+    tasks = []
+    try:
+        await websocket.accept()
+        tasks = [
+            asyncio.create_task(_send_events(websocket, subscription)),
+            asyncio.create_task(_receive_until_disconnect(websocket)),
+        ]
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.unsubscribe(subscription)
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from datetime import datetime
 
 
 class GroupCreateRequest(BaseModel):
@@ -24,6 +25,21 @@ class ChatResponse(BaseModel):
         from_attributes = True
 
 
+class ChatListItemResponse(ChatResponse):
+    message_count: int
+    last_message_id: Optional[int] = None
+    last_message_at: Optional[datetime] = None
+    last_sender_id: Optional[int] = None
+    last_message_preview: Optional[str] = None
+    last_read_message_id: Optional[int] = None
+    unread_count: int = 0
+
+
+class ChatListResponse(BaseModel):
+    chats: List[ChatListItemResponse]
+    next_cursor: Optional[str] = None
+
+
 class GroupMemberResponse(BaseModel):
     id: int
     chat_id: int
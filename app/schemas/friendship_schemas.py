@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class FriendResponse(BaseModel):
+    id: int
+    name: Optional[str] = None
+    last_name: Optional[str] = None
+    photo_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class FriendshipUserResponse(FriendResponse):
+    friendship_id: int
+
+
+class FriendListResponse(BaseModel):
+    friends: List[FriendshipUserResponse]
+    next_cursor: Optional[str] = None
+
+
+class IncomingRequestListResponse(BaseModel):
+    requests: List[FriendshipUserResponse]
+    next_cursor: Optional[str] = None
+
+
+class FriendshipCountResponse(BaseModel):
+    friends: int
+    incoming: int
+
+
+class MutualFriendsResponse(BaseModel):
+    count: int
+    users: List[FriendResponse]
+
+
+class FriendSuggestionResponse(BaseModel):
+    user: FriendResponse
+    mutual_count: int
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 
 class MessageCreateRequest(BaseModel):
@@ -10,6 +11,15 @@ class MessageUpdateRequest(BaseModel):
     content: str
 
 
+class MessageReadRequest(BaseModel):
+    message_id: Optional[int] = None
+
+
+class MessageReadResponse(BaseModel):
+    chat_id: int
+    last_read_message_id: Optional[int]
+
+
 class MessageResponse(BaseModel):
     id: int
     chat_id: int
@@ -26,3 +36,10 @@ class MessageListResponse(BaseModel):
     total: int
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class MessageSearchResponse(BaseModel):
+    messages: list[MessageResponse]
+    next_cursor: Optional[str] = None
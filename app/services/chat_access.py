@@ -0,0 +1,126 @@
+from fastapi import Depends, HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from typing import Optional
+
+from app.core.database import get_db
+from app.core.security import get_current_user_claims, TokenClaims
+from app.models import Chat, ChatParticipant
+from app.models.enums import ChatParticipantRole
+from app.services import membership_cache
+
+
+class ChatAccess(BaseModel):
+    """Результат проверки доступа к чату: чат, роль вызывающего и (опционально) цели"""
+    chat_id: int
+    user_id: int
+    is_group: bool
+    role: ChatParticipantRole
+    target_user_id: Optional[int] = None
+    target_role: Optional[ChatParticipantRole] = None
+
+    class Config:
+        frozen = True
+
+
+async def load_chat_access(
+    db: AsyncSession,
+    chat_id: int,
+    user_id: int,
+    target_user_id: Optional[int] = None,
+    group_only: bool = False
+) -> ChatAccess:
+    """Загружает чат, членство вызывающего и цели одним запросом.
+
+    Сохраняет прежние ответы: 404 - чата нет, 400 - чат не групповой
+    (при ``group_only``), 403 - вызывающий не участник. Членство цели только
+    загружается (``target_role`` может быть None), проверяет его сервис.
+    """
+    is_group = membership_cache.chat_kinds.get(chat_id)
+    role = membership_cache.member_roles.get((chat_id, user_id))
+    target_role = None
+    if target_user_id is not None:
+        target_role = membership_cache.member_roles.get((chat_id, target_user_id))
+
+    cached = is_group is not None and role is not None and (target_user_id is None or target_role is not None)
+    if not cached:
+        caller = aliased(ChatParticipant)
+        query = (
+            select(Chat.is_group, caller.role)
+            .select_from(Chat)
+            .outerjoin(caller, (caller.chat_id == Chat.id) & (caller.user_id == user_id))
+            .where(Chat.id == chat_id)
+        )
+        if target_user_id is not None:
+            target = aliased(ChatParticipant)
+            query = (
+                query
+                .add_columns(target.role)
+                .outerjoin(target, (target.chat_id == Chat.id) & (target.user_id == target_user_id))
+            )
+
+        result = await db.execute(query)
+        row = result.first()
+
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Chat not found"
+            )
+
+        is_group, role = row[0], row[1]
+        if target_user_id is not None:
+            target_role = row[2]
+        membership_cache.chat_kinds.set(chat_id, is_group)
+        if role is not None:
+            membership_cache.member_roles.set((chat_id, user_id), role)
+        if target_role is not None:
+            membership_cache.member_roles.set((chat_id, target_user_id), target_role)
+
+    if group_only and not is_group:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This chat is not a group chat"
+        )
+
+    if role is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not a member of this group" if group_only else "You are not a member of this chat"
+        )
+
+    return ChatAccess(
+        chat_id=chat_id,
+        user_id=user_id,
+        is_group=is_group,
+        role=role,
+        target_user_id=target_user_id,
+        target_role=target_role
+    )
+
+
+async def get_chat_access(
+    chat_id: int,
+    current_user: TokenClaims = Depends(get_current_user_claims),
+    db: AsyncSession = Depends(get_db)
+) -> ChatAccess:
+    return await load_chat_access(db, chat_id, current_user.id)
+
+
+async def get_group_access(
+    chat_id: int,
+    current_user: TokenClaims = Depends(get_current_user_claims),
+    db: AsyncSession = Depends(get_db)
+) -> ChatAccess:
+    return await load_chat_access(db, chat_id, current_user.id, group_only=True)
+
+
+async def get_group_target_access(
+    chat_id: int,
+    user_id: int,
+    current_user: TokenClaims = Depends(get_current_user_claims),
+    db: AsyncSession = Depends(get_db)
+) -> ChatAccess:
+    return await load_chat_access(db, chat_id, current_user.id, target_user_id=user_id, group_only=True)
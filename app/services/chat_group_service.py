@@ -1,43 +1,78 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func, literal, Integer
+from sqlalchemy.dialects.postgresql import insert, ARRAY
 from fastapi import HTTPException, status
 from typing import List, Optional
 import random
 
+from app.core.broadcast import broadcast
 from app.models import Chat, ChatParticipant
 from app.models.enums import ChatParticipantRole
-from app.services.friendship_service import get_friends
+from app.services import membership_cache
+from app.services.friend_cache import filter_friends
 
 async def ensure_group_member(db: AsyncSession, chat_id: int, user_id: int):
-    result = await db.execute(select(ChatParticipant).where((ChatParticipant.chat_id == chat_id)
-                                                            & (ChatParticipant.user_id == user_id)))
-    participant = result.scalar_one_or_none()
+    role = await membership_cache.get_member_role(db, chat_id, user_id)
 
-    if not participant:
+    if role is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not a member of this group"
         )
 
-    return participant
+    return role
 
 async def ensure_group_chat(db: AsyncSession, chat_id: int):
-    result = await db.execute(select(Chat).where(Chat.id == chat_id))
-    chat = result.scalar_one_or_none()
+    is_group = await membership_cache.get_chat_is_group(db, chat_id)
 
-    if not chat:
+    if is_group is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chat not found"
         )
 
-    if not chat.is_group:
+    if not is_group:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This chat is not a group chat"
         )
 
-    return chat
+async def get_group_participant(db: AsyncSession, chat_id: int, user_id: int):
+    """Строка участника для изменения; роль берется не из кэша, а из БД"""
+    result = await db.execute(select(ChatParticipant).where((ChatParticipant.chat_id == chat_id)
+                                                            & (ChatParticipant.user_id == user_id)))
+    participant = result.scalar_one_or_none()
+
+    if not participant:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not a member of this group"
+        )
+
+    return participant
+
+async def add_chat_participants(db: AsyncSession, chat_id: int, user_ids: List[int],
+                                role: ChatParticipantRole = ChatParticipantRole.PARTICIPANT):
+    """Добавляет участников одним INSERT ... SELECT, уже состоящих пропускает ON CONFLICT.
+
+    Возвращает добавленные id в порядке ``user_ids``. Транзакцию не фиксирует.
+    """
+    if not user_ids:
+        return []
+
+    requested = func.unnest(literal(user_ids, ARRAY(Integer))).table_valued("user_id").render_derived()
+    result = await db.execute(
+        insert(ChatParticipant)
+        .from_select(
+            ["chat_id", "user_id", "role"],
+            select(literal(chat_id), requested.c.user_id, literal(role, ChatParticipant.role.type))
+        )
+        .on_conflict_do_nothing(index_elements=[ChatParticipant.chat_id, ChatParticipant.user_id])
+        .returning(ChatParticipant.user_id)
+    )
+    added = set(result.scalars().all())
+
+    return [user_id for user_id in user_ids if user_id in added]
 
 async def create_group_chat(db: AsyncSession, group_title: str, creator_id: int, friend_ids: Optional[List[int]] = None):
     if friend_ids is None:
@@ -55,25 +90,18 @@ async def create_group_chat(db: AsyncSession, group_title: str, creator_id: int,
     )
     db.add(creator_participant)
 
-    friends = await get_friends(db, creator_id)
-    valid_friends_ids = {f.id for f in friends}
-
-    valid_to_add = [fid for fid in friend_ids if fid in valid_friends_ids]
+    valid_to_add = await filter_friends(db, creator_id, friend_ids)
     if not valid_to_add:
         raise HTTPException(
             status_code=400,
             detail="You can only add your own friends"
         )
 
-    for friend_id in valid_to_add:
-        db.add(ChatParticipant(
-            chat_id=create_chat.id,
-            user_id=friend_id,
-            role=ChatParticipantRole.PARTICIPANT
-        ))
+    added = await add_chat_participants(db, create_chat.id, valid_to_add)
 
     await db.commit()
-    
+    await broadcast.publish_members(create_chat.id, "member.added", [creator_id, *added])
+
     return create_chat
 
 async def add_group_members(db: AsyncSession, chat_id: int, added_by: int, friend_ids: Optional[List[int]] = None):
@@ -87,35 +115,23 @@ async def add_group_members(db: AsyncSession, chat_id: int, added_by: int, frien
 
     await ensure_group_member(db, chat_id, added_by)
 
-    friends = await get_friends(db, added_by)
-    valid_friends_ids = {f.id for f in friends}
-
-    valid_to_add = [fid for fid in friend_ids if fid in valid_friends_ids]
+    valid_to_add = await filter_friends(db, added_by, friend_ids)
     if not valid_to_add:
         raise HTTPException(
             status_code=400,
             detail="You can only add your own friends"
         )
 
-    result = await db.execute(select(ChatParticipant.user_id).where((ChatParticipant.chat_id == chat_id)
-                                                            & (ChatParticipant.user_id.in_(valid_to_add))))
-    already_in_group = set(result.scalars().all())
-    to_add = [fid for fid in valid_to_add if fid not in already_in_group]
-
+    to_add = await add_chat_participants(db, chat_id, valid_to_add)
     if not to_add:
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="All selected users are already in the group"
         )
 
-    for friend_id in to_add:
-        db.add(ChatParticipant(
-            chat_id=chat_id,
-            user_id=friend_id,
-            role=ChatParticipantRole.PARTICIPANT
-        ))
-
     await db.commit()
+    await broadcast.publish_members(chat_id, "member.added", to_add)
     return to_add
 
 async def get_group_members(db: AsyncSession, chat_id: int, viewer_id: int):
@@ -138,8 +154,8 @@ async def delete_group_member(db: AsyncSession, chat_id: int, user_id: int, remo
             detail="User is not a member of this group"
         )
 
-    remover_participant = await ensure_group_member(db, chat_id, removed_by)
-    if remover_participant.role not in [ChatParticipantRole.ADMIN, ChatParticipantRole.CREATOR]:
+    remover_role = await ensure_group_member(db, chat_id, removed_by)
+    if remover_role not in [ChatParticipantRole.ADMIN, ChatParticipantRole.CREATOR]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only group creator or admins are allowed to remove members"
@@ -152,7 +168,7 @@ async def delete_group_member(db: AsyncSession, chat_id: int, user_id: int, remo
         )
 
     if target_participant.role in [ChatParticipantRole.ADMIN, ChatParticipantRole.CREATOR]:
-        if remover_participant.role == ChatParticipantRole.ADMIN:
+        if remover_role == ChatParticipantRole.ADMIN:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="You cannot remove creator/admin from the group"
@@ -160,12 +176,14 @@ async def delete_group_member(db: AsyncSession, chat_id: int, user_id: int, remo
 
     await db.delete(target_participant)
     await db.commit()
+    membership_cache.forget_member(chat_id, user_id)
+    await broadcast.publish_members(chat_id, "member.removed", [user_id])
     return {"removed_user_id": user_id}
 
 async def leave_group(db: AsyncSession, chat_id: int, user_id: int):
     await ensure_group_chat(db, chat_id)
 
-    participant = await ensure_group_member(db, chat_id, user_id)
+    participant = await get_group_participant(db, chat_id, user_id)
 
     if participant.role == ChatParticipantRole.CREATOR:
         result = await db.execute(select(ChatParticipant).where((ChatParticipant.chat_id == chat_id)
@@ -177,6 +195,8 @@ async def leave_group(db: AsyncSession, chat_id: int, user_id: int):
             await db.delete(participant)
             await db.delete(chat)
             await db.commit()
+            membership_cache.forget_chat(chat_id)
+            await broadcast.publish_chat_deleted(chat_id)
             return {"message": "You were the only member. Group deleted."}
 
         admins = [p for p in other_participants if p.role == ChatParticipantRole.ADMIN]
@@ -189,21 +209,26 @@ async def leave_group(db: AsyncSession, chat_id: int, user_id: int):
 
         await db.delete(participant)
         await db.commit()
+        membership_cache.forget_member(chat_id, user_id)
+        membership_cache.forget_member(chat_id, new_creator.user_id)
+        await broadcast.publish_members(chat_id, "member.removed", [user_id])
 
         return {"message": f"You left the group. New creator is user {new_creator.user_id}"}
 
     await db.delete(participant)
     await db.commit()
+    membership_cache.forget_member(chat_id, user_id)
+    await broadcast.publish_members(chat_id, "member.removed", [user_id])
 
     return {"message": "You have left the group"}
 
 async def promote_to_admin(db: AsyncSession, chat_id: int, target_user_id: int, requested_by: int):
     await ensure_group_chat(db, chat_id)
 
-    requester = await ensure_group_member(db, chat_id, requested_by)
-    target = await ensure_group_member(db, chat_id, target_user_id)
+    requester_role = await ensure_group_member(db, chat_id, requested_by)
+    target = await get_group_participant(db, chat_id, target_user_id)
 
-    if requester.role not in [ChatParticipantRole.CREATOR, ChatParticipantRole.ADMIN]:
+    if requester_role not in [ChatParticipantRole.CREATOR, ChatParticipantRole.ADMIN]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only creator or admins can promote members"
@@ -225,6 +250,7 @@ async def promote_to_admin(db: AsyncSession, chat_id: int, target_user_id: int,
     db.add(target)
     await db.commit()
     await db.refresh(target)
+    membership_cache.forget_member(chat_id, target_user_id)
 
     return {"message": f"User {target_user_id} has been promoted to admin"}
 
@@ -232,10 +258,10 @@ async def promote_to_admin(db: AsyncSession, chat_id: int, target_user_id: int,
 async def demote_to_participant(db: AsyncSession, chat_id: int, target_user_id: int, requested_by: int):
     await ensure_group_chat(db, chat_id)
 
-    requester = await ensure_group_member(db, chat_id, requested_by)
-    target = await ensure_group_member(db, chat_id, target_user_id)
+    requester_role = await ensure_group_member(db, chat_id, requested_by)
+    target = await get_group_participant(db, chat_id, target_user_id)
 
-    if requester.role != ChatParticipantRole.CREATOR:
+    if requester_role != ChatParticipantRole.CREATOR:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only the group creator can demote admins"
@@ -257,15 +283,16 @@ async def demote_to_participant(db: AsyncSession, chat_id: int, target_user_id:
     db.add(target)
     await db.commit()
     await db.refresh(target)
+    membership_cache.forget_member(chat_id, target_user_id)
 
     return {"message": f"User {target_user_id} has been demoted to participant"}
 
 async def update_group_title(db: AsyncSession, chat_id: int, new_title: str, updated_by: int):
-    chat = await ensure_group_chat(db, chat_id)
+    await ensure_group_chat(db, chat_id)
 
-    participant = await ensure_group_member(db, chat_id, updated_by)
+    role = await ensure_group_member(db, chat_id, updated_by)
 
-    if participant.role not in [ChatParticipantRole.ADMIN, ChatParticipantRole.CREATOR]:
+    if role not in [ChatParticipantRole.ADMIN, ChatParticipantRole.CREATOR]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only group creator or admins can change the group title"
@@ -277,6 +304,7 @@ async def update_group_title(db: AsyncSession, chat_id: int, new_title: str, upd
             detail="Group title cannot be empty"
         )
 
+    chat = await db.get(Chat, chat_id)
     chat.title = new_title
     db.add(chat)
     await db.commit()
@@ -1,37 +1,97 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from sqlalchemy import select, func
+from sqlalchemy import select, func, case, true, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import aliased
+from typing import Optional
+from datetime import datetime, UTC
 
-from app.models import ChatParticipant, Chat, User
+from app.core.broadcast import broadcast
+from app.core.config import settings
+from app.core.pagination import pack_cursor, unpack_cursor, invalid_cursor
+from app.models import ChatParticipant, Chat, User, ChatSummary, Message
 
-async def get_user_chats(db: AsyncSession, user_id: int):
-    result = await db.execute(
-        select(Chat)
-        .join(ChatParticipant)
+# Чаты без сообщений идут в конце списка
+NO_ACTIVITY = datetime(1970, 1, 1, tzinfo=UTC)
+
+async def get_user_chats(db: AsyncSession, user_id: int, limit: int = 50, cursor: Optional[str] = None):
+    other_participant = aliased(ChatParticipant)
+
+    # Собеседник в приватном чате, для групп подзапрос ничего не возвращает
+    other_user = (
+        select(User.name, User.email)
+        .join(other_participant, other_participant.user_id == User.id)
+        .where(
+            Chat.is_group == False,
+            other_participant.chat_id == Chat.id,
+            other_participant.user_id != user_id
+        )
+        .limit(1)
+        .lateral("other_user")
+    )
+
+    # Используем name, если есть, иначе email
+    title = case(
+        (Chat.is_group, Chat.title),
+        else_=func.coalesce(func.nullif(other_user.c.name, ""), other_user.c.email, Chat.title)
+    ).label("title")
+
+    # Непрочитанные: диапазон по индексу (chat_id, id) после маркера прочтения,
+    # не больше UNREAD_COUNT_CAP; для прочитанных чатов подсчет не выполняется
+    last_read = func.coalesce(ChatParticipant.last_read_message_id, 0)
+    unread_messages = (
+        select(Message.id)
+        .where((Message.chat_id == ChatParticipant.chat_id) & (Message.id > last_read))
+        .limit(settings.UNREAD_COUNT_CAP)
+        .correlate(ChatParticipant)
+        .subquery()
+    )
+    unread_count = case(
+        (last_read >= func.coalesce(ChatSummary.last_message_id, 0), 0),
+        else_=select(func.count()).select_from(unread_messages).scalar_subquery()
+    ).label("unread_count")
+
+    # Сортировка по последней активности из сводки, без MAX по messages
+    activity = func.coalesce(ChatSummary.last_message_at, NO_ACTIVITY)
+
+    query = (
+        select(
+            Chat.id,
+            title,
+            Chat.is_group,
+            Chat.message_count,
+            ChatSummary.last_message_id,
+            ChatSummary.last_message_at,
+            ChatSummary.last_sender_id,
+            ChatSummary.preview.label("last_message_preview"),
+            ChatParticipant.last_read_message_id,
+            unread_count,
+            activity.label("activity")
+        )
+        .select_from(ChatParticipant)
+        .join(Chat, Chat.id == ChatParticipant.chat_id)
+        .outerjoin(ChatSummary, ChatSummary.chat_id == Chat.id)
+        .outerjoin(other_user, true())
         .where(ChatParticipant.user_id == user_id)
-        .order_by(Chat.id.desc())
     )
-    chats = result.scalars().unique().all()
-
-    if not chats:
-        return []
-
-    for chat in chats:
-        if not chat.is_group:
-            result = await db.execute(
-                select(User)
-                .join(ChatParticipant)
-                .where(
-                    ChatParticipant.chat_id == chat.id,
-                    ChatParticipant.user_id != user_id
-                )
-            )
-            other_user = result.scalar_one_or_none()
-            if other_user:
-                # Используем name, если есть, иначе email
-                chat.title = other_user.name if other_user.name else other_user.email
-
-    return chats
+
+    if cursor:
+        last_activity, last_chat_id = unpack_cursor(cursor, 2)
+        try:
+            position = (datetime.fromisoformat(last_activity), int(last_chat_id))
+        except ValueError:
+            raise invalid_cursor()
+        query = query.where(tuple_(activity, Chat.id) < tuple_(*position))
+
+    result = await db.execute(query.order_by(activity.desc(), Chat.id.desc()).limit(limit + 1))
+    chats = result.all()
+
+    next_cursor = None
+    if len(chats) > limit:
+        chats = chats[:limit]
+        next_cursor = pack_cursor(chats[-1].activity.isoformat(), chats[-1].id)
+
+    return {"chats": chats, "next_cursor": next_cursor}
 
 async def get_or_create_private_chat(db: AsyncSession, user_id: int, friend_id: int):
     if user_id == friend_id:
@@ -40,32 +100,35 @@ async def get_or_create_private_chat(db: AsyncSession, user_id: int, friend_id:
             detail="Cannot create private chat with yourself"
         )
 
-    result = await db.execute(
-        select(Chat)
-        .join(ChatParticipant)
-        .where(
-            Chat.is_group == False,
-            ChatParticipant.user_id.in_([user_id, friend_id])
-        )
-        .group_by(Chat.id)
-        .having(func.count(ChatParticipant.user_id) == 2)
-    )
+    low_user_id, high_user_id = sorted((user_id, friend_id))
+    pair = (Chat.private_low_user_id == low_user_id) & (Chat.private_high_user_id == high_user_id)
+
+    result = await db.execute(select(Chat).where(pair))
     existing_chat = result.scalar_one_or_none()
 
     if existing_chat:
         return existing_chat
 
-    new_chat = Chat(is_group=False)
-    db.add(new_chat)
-    await db.flush()
-    await db.refresh(new_chat)
+    # При одновременном создании второй запрос дождется первого и получит конфликт
+    result = await db.execute(
+        insert(Chat)
+        .values(is_group=False, private_low_user_id=low_user_id, private_high_user_id=high_user_id)
+        .on_conflict_do_nothing(index_elements=[Chat.private_low_user_id, Chat.private_high_user_id])
+        .returning(Chat.id)
+    )
+    chat_id = result.scalar_one_or_none()
+
+    if chat_id is None:
+        await db.commit()
+        result = await db.execute(select(Chat).where(pair))
+        return result.scalar_one()
 
     db.add_all([
-        ChatParticipant(chat_id=new_chat.id, user_id=user_id),
-        ChatParticipant(chat_id=new_chat.id, user_id=friend_id)
+        ChatParticipant(chat_id=chat_id, user_id=user_id),
+        ChatParticipant(chat_id=chat_id, user_id=friend_id)
     ])
 
     await db.commit()
-    await db.refresh(new_chat)
+    await broadcast.publish_members(chat_id, "member.added", [user_id, friend_id])
 
-    return new_chat
\ No newline at end of file
+    return await db.get(Chat, chat_id)
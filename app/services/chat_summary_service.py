@@ -0,0 +1,72 @@
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.models import ChatSummary, Message
+
+
+def make_preview(content: str) -> str:
+    return content[:settings.CHAT_PREVIEW_LENGTH]
+
+
+async def _upsert_summary(db, chat_id: int, message_id: int, sender_id: int, content: str, created_at,
+                          only_newer: bool):
+    statement = insert(ChatSummary).values(
+        chat_id=chat_id,
+        last_message_id=message_id,
+        last_message_at=created_at,
+        last_sender_id=sender_id,
+        preview=make_preview(content)
+    )
+    where = None
+    if only_newer:
+        where = (ChatSummary.last_message_at.is_(None)) | (ChatSummary.last_message_at <= statement.excluded.last_message_at)
+
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[ChatSummary.chat_id],
+            set_={
+                "last_message_id": statement.excluded.last_message_id,
+                "last_message_at": statement.excluded.last_message_at,
+                "last_sender_id": statement.excluded.last_sender_id,
+                "preview": statement.excluded.preview
+            },
+            where=where
+        )
+    )
+
+
+async def record_message(db, chat_id: int, message_id: int, sender_id: int, content: str, created_at):
+    """Делает сообщение последним в сводке чата, если оно не старше текущего"""
+    await _upsert_summary(db, chat_id, message_id, sender_id, content, created_at, only_newer=True)
+
+
+async def update_preview(db, message: Message):
+    """Обновляет превью, если отредактировано последнее сообщение чата"""
+    await db.execute(
+        update(ChatSummary)
+        .where((ChatSummary.chat_id == message.chat_id) & (ChatSummary.last_message_id == message.id))
+        .values(preview=make_preview(message.content))
+    )
+
+
+async def refresh_summary(db, chat_id: int):
+    """Пересчитывает сводку по последнему сообщению чата"""
+    result = await db.execute(
+        select(Message.id, Message.sender_id, Message.content, Message.created_at)
+        .where(Message.chat_id == chat_id)
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(1)
+    )
+    latest = result.first()
+
+    if latest is None:
+        await db.execute(
+            update(ChatSummary)
+            .where(ChatSummary.chat_id == chat_id)
+            .values(last_message_id=None, last_message_at=None, last_sender_id=None, preview=None)
+        )
+        return
+
+    await _upsert_summary(db, chat_id, latest.id, latest.sender_id, latest.content, latest.created_at,
+                          only_newer=False)
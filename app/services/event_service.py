@@ -4,9 +4,12 @@ from fastapi import HTTPException, status
 from typing import Optional, List
 from datetime import datetime
 
+from app.core.broadcast import broadcast
 from app.models import Event, Chat, ChatParticipant, User
 from app.models.enums import ChatParticipantRole
-from app.services.friendship_service import get_friends
+from app.services import membership_cache
+from app.services.chat_group_service import add_chat_participants
+from app.services.friend_cache import filter_friends
 
 
 async def create_event(
@@ -41,21 +44,10 @@ async def create_event(
     )
     db.add(creator_participant)
 
+    added = []
     if participant_ids:
-        friends = await get_friends(db, creator_id)
-        valid_friends_ids = {f.id for f in friends}
-
-        valid_to_add = [pid for pid in participant_ids if pid in valid_friends_ids]
-        
-        valid_to_add = [pid for pid in valid_to_add if pid != creator_id]
-
-        if valid_to_add:
-            for participant_id in valid_to_add:
-                db.add(ChatParticipant(
-                    chat_id=event_chat.id,
-                    user_id=participant_id,
-                    role=ChatParticipantRole.PARTICIPANT
-                ))
+        valid_to_add = await filter_friends(db, creator_id, [pid for pid in participant_ids if pid != creator_id])
+        added = await add_chat_participants(db, event_chat.id, valid_to_add)
 
     event = Event(
         title=title.strip(),
@@ -66,6 +58,7 @@ async def create_event(
     )
     db.add(event)
     await db.commit()
+    await broadcast.publish_members(event_chat.id, "member.added", [creator_id, *added])
     await db.refresh(event)
     await db.refresh(event_chat)
 
@@ -107,21 +100,55 @@ async def get_event(
             detail="Event not found"
         )
 
-    participant_result = await db.execute(
-        select(ChatParticipant).where(
-            (ChatParticipant.chat_id == event.chat_id) &
-            (ChatParticipant.user_id == user_id)
+    role = await membership_cache.get_member_role(db, event.chat_id, user_id)
+
+    if role is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not a participant of this event"
         )
+
+    return event
+
+
+async def get_event_with_chat(
+    db: AsyncSession,
+    event_id: int,
+    user_id: int
+):
+    # Событие, его чат и роль пользователя одним запросом
+    result = await db.execute(
+        select(Event, Chat, ChatParticipant.role)
+        .outerjoin(Chat, Chat.id == Event.chat_id)
+        .outerjoin(ChatParticipant, (ChatParticipant.chat_id == Event.chat_id) & (ChatParticipant.user_id == user_id))
+        .where(Event.id == event_id)
     )
-    participant = participant_result.scalar_one_or_none()
+    row = result.first()
+
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+
+    event, chat, role = row
 
-    if not participant:
+    if role is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not a participant of this event"
         )
 
-    return event
+    if not chat:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat associated with event not found"
+        )
+
+    membership_cache.member_roles.set((chat.id, user_id), role)
+    membership_cache.chat_kinds.set(chat.id, chat.is_group)
+
+    return event, chat
 
 
 async def update_event(
@@ -141,21 +168,15 @@ async def update_event(
             detail="Event not found"
         )
 
-    participant_result = await db.execute(
-        select(ChatParticipant).where(
-            (ChatParticipant.chat_id == event.chat_id) &
-            (ChatParticipant.user_id == user_id)
-        )
-    )
-    participant = participant_result.scalar_one_or_none()
+    role = await membership_cache.get_member_role(db, event.chat_id, user_id)
 
-    if not participant:
+    if role is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not a participant of this event"
         )
 
-    if participant.role not in [ChatParticipantRole.CREATOR, ChatParticipantRole.ADMIN]:
+    if role not in [ChatParticipantRole.CREATOR, ChatParticipantRole.ADMIN]:
         if event.creator_id != user_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -219,6 +240,8 @@ async def delete_event(
         await db.delete(chat)
     
     await db.commit()
+    membership_cache.forget_chat(chat_id)
+    await broadcast.publish_chat_deleted(chat_id)
 
     return {"message": "Event and associated chat deleted successfully"}
 
@@ -244,47 +267,24 @@ async def add_event_participants(
             detail="Event not found"
         )
 
-    participant_result = await db.execute(
-        select(ChatParticipant).where(
-            (ChatParticipant.chat_id == event.chat_id) &
-            (ChatParticipant.user_id == added_by)
-        )
-    )
-    participant = participant_result.scalar_one_or_none()
+    role = await membership_cache.get_member_role(db, event.chat_id, added_by)
 
-    if not participant:
+    if role is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not a participant of this event"
         )
 
-    friends = await get_friends(db, added_by)
-    valid_friends_ids = {f.id for f in friends}
-
-    valid_to_add = [pid for pid in participant_ids if pid in valid_friends_ids]
-    
-    existing_result = await db.execute(
-        select(ChatParticipant.user_id)
-        .where(
-            (ChatParticipant.chat_id == event.chat_id) &
-            (ChatParticipant.user_id.in_(valid_to_add))
-        )
-    )
-    already_participants = set(existing_result.scalars().all())
-    to_add = [pid for pid in valid_to_add if pid not in already_participants]
+    valid_to_add = await filter_friends(db, added_by, participant_ids)
+    to_add = await add_chat_participants(db, event.chat_id, valid_to_add)
 
     if not to_add:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="All selected users are already participants of this event"
         )
 
-    for participant_id in to_add:
-        db.add(ChatParticipant(
-            chat_id=event.chat_id,
-            user_id=participant_id,
-            role=ChatParticipantRole.PARTICIPANT
-        ))
-
     await db.commit()
+    await broadcast.publish_members(event.chat_id, "member.added", to_add)
     return {"added_participant_ids": to_add}
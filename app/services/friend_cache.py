@@ -0,0 +1,57 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Iterable, List
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import Friendship
+from app.models.enums import FriendshipStatus
+
+# user_id -> frozenset id друзей
+friend_ids = TTLCache(maxsize=settings.FRIEND_CACHE_SIZE, ttl=settings.FRIEND_CACHE_TTL_SECONDS)
+
+
+def friend_ids_query(user_id: int):
+    """id друзей пользователя: два диапазона по индексам канонической пары"""
+    as_low = select(Friendship.high_user_id.label("friend_id")).where(
+        (Friendship.low_user_id == user_id) & (Friendship.status == FriendshipStatus.ACCEPTED)
+    )
+    as_high = select(Friendship.low_user_id.label("friend_id")).where(
+        (Friendship.high_user_id == user_id) & (Friendship.status == FriendshipStatus.ACCEPTED)
+    )
+    return as_low.union_all(as_high)
+
+
+async def get_friend_ids(db: AsyncSession, user_id: int) -> frozenset:
+    ids = friend_ids.get(user_id)
+    if ids is not None:
+        return ids
+
+    result = await db.execute(friend_ids_query(user_id))
+    ids = frozenset(result.scalars().all())
+    friend_ids.set(user_id, ids)
+
+    return ids
+
+
+async def filter_friends(db: AsyncSession, user_id: int, candidate_ids: Iterable[int]) -> List[int]:
+    """Те из ``candidate_ids``, кто дружит с пользователем, в исходном порядке.
+
+    Проверка идет по множеству id друзей из кэша; при промахе оно загружается
+    одним запросом только по id и кладется в кэш для следующих вызовов.
+    """
+    candidate_ids = list(dict.fromkeys(candidate_ids))
+    if not candidate_ids:
+        return []
+
+    ids = await get_friend_ids(db, user_id)
+    return [candidate_id for candidate_id in candidate_ids if candidate_id in ids]
+
+
+def forget(*user_ids: int):
+    for user_id in user_ids:
+        friend_ids.invalidate(user_id)
+
+
+def stats():
+    return friend_ids.stats()
@@ -0,0 +1,154 @@
+import asyncio
+import heapq
+import logging
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models import Friendship
+from app.models.enums import FriendshipStatus
+
+logger = logging.getLogger(__name__)
+
+_EMPTY = array("i")
+
+
+def _contains(ids: array, value: int) -> bool:
+    position = bisect_left(ids, value)
+    return position < len(ids) and ids[position] == value
+
+
+def intersect_sorted(left: array, right: array) -> List[int]:
+    """Пересечение двух отсортированных массивов id.
+
+    Если один массив намного короче, каждый его элемент ищется бинарным
+    поиском в длинном; иначе пересекаются множества.
+    """
+    if len(left) > len(right):
+        left, right = right, left
+    if not left:
+        return []
+    if len(left) * 16 < len(right):
+        return [value for value in left if _contains(right, value)]
+    return sorted(set(left).intersection(right))
+
+
+class FriendGraph:
+    """Граф дружбы в памяти: для каждого пользователя отсортированный array('i') id друзей.
+
+    Загружается из ``friendships`` при старте и периодически перестраивается,
+    чтобы подтянуть изменения с других воркеров; изменения текущего воркера
+    применяются сразу через ``add_edge``/``remove_edge``. Пока граф не
+    загружен, ``ready`` равен False и сервисы обращаются к БД.
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.ready = False
+        self._adjacency: Dict[int, array] = {}
+        self._pending: List[Tuple[bool, int, int]] | None = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.rebuild()
+            except Exception:
+                logger.exception("Failed to load friend graph")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def rebuild(self):
+        # Изменения, пришедшие во время загрузки, применяются поверх нового графа
+        self._pending = []
+        try:
+            neighbours: Dict[int, List[int]] = {}
+            async with engine.connect() as conn:
+                result = await conn.stream(
+                    select(Friendship.sender_id, Friendship.receiver_id)
+                    .where(Friendship.status == FriendshipStatus.ACCEPTED)
+                    .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+                )
+                async for sender_id, receiver_id in result:
+                    neighbours.setdefault(sender_id, []).append(receiver_id)
+                    neighbours.setdefault(receiver_id, []).append(sender_id)
+
+            self._adjacency = {
+                user_id: array("i", sorted(set(ids))) for user_id, ids in neighbours.items()
+            }
+            pending, self._pending = self._pending, None
+            for added, user_id, friend_id in pending:
+                self._apply(added, user_id, friend_id)
+        finally:
+            self._pending = None
+
+        self.ready = True
+
+    def friends(self, user_id: int) -> array:
+        return self._adjacency.get(user_id, _EMPTY)
+
+    def add_edge(self, user_id: int, friend_id: int):
+        self._apply(True, user_id, friend_id)
+
+    def remove_edge(self, user_id: int, friend_id: int):
+        self._apply(False, user_id, friend_id)
+
+    def _apply(self, added: bool, user_id: int, friend_id: int):
+        if self._pending is not None:
+            self._pending.append((added, user_id, friend_id))
+
+        for a, b in ((user_id, friend_id), (friend_id, user_id)):
+            ids = self._adjacency.get(a)
+            if added:
+                if ids is None:
+                    self._adjacency[a] = array("i", [b])
+                elif not _contains(ids, b):
+                    insort(ids, b)
+            elif ids is not None:
+                position = bisect_left(ids, b)
+                if position < len(ids) and ids[position] == b:
+                    del ids[position]
+
+    def mutual(self, user_id: int, other_id: int) -> List[int]:
+        return intersect_sorted(self.friends(user_id), self.friends(other_id))
+
+    def suggestions(self, user_id: int, limit: int) -> List[Tuple[int, int]]:
+        """Топ ``limit`` друзей друзей по числу общих друзей: [(user_id, mutual_count)]"""
+        friends = self.friends(user_id)
+        counts: Counter = Counter()
+        for friend_id in friends[:settings.FRIEND_SUGGESTION_FANOUT]:
+            counts.update(self.friends(friend_id))
+
+        counts.pop(user_id, None)
+        for friend_id in friends:
+            counts.pop(friend_id, None)
+
+        return heapq.nlargest(limit, counts.items(), key=lambda item: (item[1], -item[0]))
+
+    def stats(self):
+        return {
+            "ready": self.ready,
+            "users": len(self._adjacency),
+            "edges": sum(len(ids) for ids in self._adjacency.values()) // 2
+        }
+
+
+friend_graph = FriendGraph(settings.FRIEND_GRAPH_REFRESH_SECONDS)
@@ -1,9 +1,14 @@
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from typing import Optional, List
 
-from app.models import Friendship
+from app.core.pagination import pack_cursor, unpack_cursor, invalid_cursor
+from app.models import Friendship, User
 from app.models.enums import FriendshipStatus
+from app.services import friend_cache
+from app.services.friend_graph import friend_graph
 
 async def send_request(db: AsyncSession, sender_id: int, receiver_id: int):
     if sender_id == receiver_id:
@@ -12,22 +17,37 @@ async def send_request(db: AsyncSession, sender_id: int, receiver_id: int):
             detail="You can't add yourself"
         )
 
+    # Пара уже занята заявкой в любую сторону; отклоненная заявка
+    # заменяется новой, ожидающая или принятая дает ошибку
+    request = insert(Friendship).values(
+        sender_id=sender_id, receiver_id=receiver_id, status=FriendshipStatus.PENDING
+    )
     result = await db.execute(
-        select(Friendship).where((Friendship.sender_id == sender_id) &
-                                        (Friendship.receiver_id == receiver_id))
+        request
+        .on_conflict_do_update(
+            index_elements=[Friendship.low_user_id, Friendship.high_user_id],
+            set_={
+                "sender_id": request.excluded.sender_id,
+                "receiver_id": request.excluded.receiver_id,
+                "status": FriendshipStatus.PENDING
+            },
+            # Новую заявку после отказа может отправить только тот, кто отказал
+            where=(Friendship.status == FriendshipStatus.REJECTED)
+            & (Friendship.sender_id != request.excluded.sender_id)
+        )
+        .returning(Friendship)
+        .execution_options(populate_existing=True)
     )
-    existing_request = result.scalar_one_or_none()
+    friendship = result.scalar_one_or_none()
 
-    if existing_request:
+    if friendship is None:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Request already exists"
         )
 
-    friendship = Friendship(sender_id=sender_id, receiver_id=receiver_id)
-    db.add(friendship)
     await db.commit()
-    await db.refresh(friendship)
 
     return friendship
 
@@ -46,34 +66,81 @@ async def update_request_status(db: AsyncSession, friendship_id: int, user_id: i
 
     friendship.status = status_value
     await db.commit()
+    friend_cache.forget(friendship.sender_id, friendship.receiver_id)
+    if status_value == FriendshipStatus.ACCEPTED:
+        friend_graph.add_edge(friendship.sender_id, friendship.receiver_id)
+    else:
+        friend_graph.remove_edge(friendship.sender_id, friendship.receiver_id)
 
     return friendship
 
-async def get_incoming_requests(db: AsyncSession, user_id: int):
-    result = await db.execute(select(Friendship).where((Friendship.status == FriendshipStatus.PENDING)
-                                                       & (Friendship.receiver_id == user_id)))
-    friendships = result.scalars().all()
+def _parse_id_cursor(cursor: str) -> int:
+    (last_id,) = unpack_cursor(cursor, 1)
+    try:
+        return int(last_id)
+    except ValueError:
+        raise invalid_cursor()
+
+async def get_incoming_requests(db: AsyncSession, user_id: int, limit: int = 50, cursor: Optional[str] = None):
+    # Только поля карточки, без пароля и остальных колонок users
+    query = (
+        select(Friendship.id.label("friendship_id"), User.id, User.name, User.last_name, User.photo_url)
+        .join(User, User.id == Friendship.sender_id)
+        .where((Friendship.status == FriendshipStatus.PENDING) & (Friendship.receiver_id == user_id))
+    )
+
+    if cursor:
+        query = query.where(Friendship.id < _parse_id_cursor(cursor))
+
+    result = await db.execute(query.order_by(Friendship.id.desc()).limit(limit + 1))
+    requests = result.all()
 
-    incoming_users = []
-    for friendship in friendships:
-        incoming_users.append(friendship.sender)
+    next_cursor = None
+    if len(requests) > limit:
+        requests = requests[:limit]
+        next_cursor = pack_cursor(requests[-1].friendship_id)
 
-    return incoming_users
+    return {"requests": requests, "next_cursor": next_cursor}
 
-async def get_friends(db: AsyncSession, user_id: int):
-    result = await db.execute(select(Friendship).where((Friendship.status == FriendshipStatus.ACCEPTED)
-                                                       & ((Friendship.receiver_id == user_id)
-                                                          | (Friendship.sender_id == user_id))))
-    friendships = result.scalars().all()
+async def get_friends(db: AsyncSession, user_id: int, limit: int = 50, cursor: Optional[str] = None):
+    # Обе половины пары идут по своим индексам в порядке id друга
+    as_low = select(Friendship.id.label("friendship_id"), Friendship.high_user_id.label("friend_id")).where(
+        (Friendship.low_user_id == user_id) & (Friendship.status == FriendshipStatus.ACCEPTED)
+    )
+    as_high = select(Friendship.id.label("friendship_id"), Friendship.low_user_id.label("friend_id")).where(
+        (Friendship.high_user_id == user_id) & (Friendship.status == FriendshipStatus.ACCEPTED)
+    )
 
-    friends = []
-    for friendship in friendships:
-        if friendship.sender_id == user_id:
-            friends.append(friendship.receiver)
-        else:
-            friends.append(friendship.sender)
+    if cursor:
+        last_id = _parse_id_cursor(cursor)
+        as_low = as_low.where(Friendship.high_user_id > last_id)
+        as_high = as_high.where(Friendship.low_user_id > last_id)
+
+    friends = as_low.union_all(as_high).subquery()
+    result = await db.execute(
+        select(friends.c.friendship_id, User.id, User.name, User.last_name, User.photo_url)
+        .join(User, User.id == friends.c.friend_id)
+        .order_by(User.id)
+        .limit(limit + 1)
+    )
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = pack_cursor(rows[-1].id)
+
+    return {"friends": rows, "next_cursor": next_cursor}
+
+async def get_friendship_counts(db: AsyncSession, user_id: int):
+    """Счетчики для бейджей: друзья из кэша множества id, входящие одним COUNT по индексу"""
+    friend_ids = await friend_cache.get_friend_ids(db, user_id)
+    result = await db.execute(
+        select(func.count()).select_from(Friendship)
+        .where((Friendship.receiver_id == user_id) & (Friendship.status == FriendshipStatus.PENDING))
+    )
 
-    return friends
+    return {"friends": len(friend_ids), "incoming": result.scalar_one()}
 
 async def delete_friend(db: AsyncSession, friendship_id: int, user_id: int):
     result = await db.execute(select(Friendship).where(Friendship.id == friendship_id))
@@ -93,5 +160,70 @@ async def delete_friend(db: AsyncSession, friendship_id: int, user_id: int):
 
     await db.delete(friendship)
     await db.commit()
+    friend_cache.forget(friendship.sender_id, friendship.receiver_id)
+    friend_graph.remove_edge(friendship.sender_id, friendship.receiver_id)
+
+    return {"message": "Friend deleted successfully"}
+
+async def _load_user_cards(db: AsyncSession, user_ids: List[int]):
+    """id, name, last_name, photo_url пользователей в порядке ``user_ids``"""
+    if not user_ids:
+        return []
+
+    result = await db.execute(
+        select(User.id, User.name, User.last_name, User.photo_url).where(User.id.in_(user_ids))
+    )
+    users = {user.id: user for user in result.all()}
+
+    return [users[user_id] for user_id in user_ids if user_id in users]
+
+async def get_mutual_friends(db: AsyncSession, user_id: int, other_id: int, limit: int = 50):
+    if user_id == other_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot get mutual friends with yourself"
+        )
+
+    if friend_graph.ready:
+        mutual_ids = friend_graph.mutual(user_id, other_id)
+    else:
+        # Граф еще не загружен: пересечение двух списков друзей в БД
+        query = friend_cache.friend_ids_query(user_id).intersect(friend_cache.friend_ids_query(other_id))
+        result = await db.execute(query)
+        mutual_ids = sorted(result.scalars().all())
+
+    return {"count": len(mutual_ids), "users": await _load_user_cards(db, mutual_ids[:limit])}
+
+async def get_friend_suggestions(db: AsyncSession, user_id: int, limit: int = 20):
+    if friend_graph.ready:
+        scored = friend_graph.suggestions(user_id, limit)
+    else:
+        # Граф еще не загружен: друзья друзей с подсчетом общих в БД
+        friends = friend_cache.friend_ids_query(user_id).subquery()
+        edges = (
+            select(Friendship.low_user_id.label("user_id"), Friendship.high_user_id.label("friend_id"))
+            .where(Friendship.status == FriendshipStatus.ACCEPTED)
+            .union_all(
+                select(Friendship.high_user_id, Friendship.low_user_id)
+                .where(Friendship.status == FriendshipStatus.ACCEPTED)
+            )
+            .subquery()
+        )
+        mutual_count = func.count().label("mutual_count")
+        result = await db.execute(
+            select(edges.c.friend_id, mutual_count)
+            .where(
+                edges.c.user_id.in_(select(friends.c.friend_id)),
+                edges.c.friend_id != user_id,
+                edges.c.friend_id.not_in(select(friends.c.friend_id))
+            )
+            .group_by(edges.c.friend_id)
+            .order_by(mutual_count.desc(), edges.c.friend_id)
+            .limit(limit)
+        )
+        scored = result.all()
+
+    counts = dict(scored)
+    users = await _load_user_cards(db, [candidate_id for candidate_id, _ in scored])
 
-    return {"message": "Friend deleted successfully"}
\ No newline at end of file
+    return [{"user": user, "mutual_count": counts[user.id]} for user in users]
@@ -0,0 +1,62 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import Chat, ChatParticipant
+from app.models.enums import ChatParticipantRole
+
+# (chat_id, user_id) -> role; кэшируется только членство, отсутствие всегда проверяется в БД
+member_roles = TTLCache(maxsize=settings.MEMBERSHIP_CACHE_SIZE, ttl=settings.MEMBERSHIP_CACHE_TTL_SECONDS)
+# chat_id -> is_group
+chat_kinds = TTLCache(maxsize=settings.MEMBERSHIP_CACHE_SIZE, ttl=settings.MEMBERSHIP_CACHE_TTL_SECONDS)
+
+
+async def get_member_role(db: AsyncSession, chat_id: int, user_id: int) -> Optional[ChatParticipantRole]:
+    role = member_roles.get((chat_id, user_id))
+    if role is not None:
+        return role
+
+    result = await db.execute(
+        select(ChatParticipant.role).where(
+            (ChatParticipant.chat_id == chat_id) & (ChatParticipant.user_id == user_id)
+        )
+    )
+    role = result.scalar_one_or_none()
+
+    if role is not None:
+        member_roles.set((chat_id, user_id), role)
+
+    return role
+
+
+async def get_chat_is_group(db: AsyncSession, chat_id: int) -> Optional[bool]:
+    """Тип чата или None, если чата нет"""
+    is_group = chat_kinds.get(chat_id)
+    if is_group is not None:
+        return is_group
+
+    result = await db.execute(select(Chat.is_group).where(Chat.id == chat_id))
+    is_group = result.scalar_one_or_none()
+
+    if is_group is not None:
+        chat_kinds.set(chat_id, is_group)
+
+    return is_group
+
+
+def forget_member(chat_id: int, user_id: int):
+    member_roles.invalidate((chat_id, user_id))
+
+
+def forget_chat(chat_id: int):
+    chat_kinds.invalidate(chat_id)
+    member_roles.invalidate_where(lambda key: key[0] == chat_id)
+
+
+def stats():
+    return {
+        "member_roles": member_roles.stats(),
+        "chat_kinds": chat_kinds.stats()
+    }
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+from datetime import datetime, UTC
+
+from sqlalchemy import insert, bindparam, func
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import Message, Chat, ChatParticipant
+from app.services import chat_summary_service
+
+logger = logging.getLogger(__name__)
+
+# Сигнал фоновой задаче: дописать очередь и завершиться
+_STOP = None
+
+
+class MessageBatcher:
+    """Пакетная запись сообщений.
+
+    Проверенные сообщения попадают в очередь, фоновая задача раз в
+    ``flush_interval`` секунд (или при наборе ``batch_size`` сообщений)
+    записывает их одним многострочным INSERT ... RETURNING и возвращает
+    каждому вызывающему его сообщение с id и created_at.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue[tuple[dict, asyncio.Future] | None] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    async def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Дожидается записи текущего пакета и всей очереди, задачу не отменяет"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._queue.put_nowait(_STOP)
+        try:
+            await self._task
+        except Exception:
+            logger.exception("Message batcher stopped with an error")
+        self._task = None
+
+        # Ни один вызывающий не должен остаться без ответа
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP and not item[1].done():
+                item[1].set_exception(RuntimeError("Message batcher is stopped"))
+
+    async def submit(self, chat_id: int, sender_id: int, content: str) -> Message:
+        if self._stopping or self._task is None:
+            raise RuntimeError("Message batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        values = {
+            "chat_id": chat_id,
+            "sender_id": sender_id,
+            "content": content,
+            "created_at": datetime.now(UTC)
+        }
+        self._queue.put_nowait((values, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                elif stopping:
+                    break
+                else:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    # Пакет и остаток очереди дописываются без ожидания интервала
+                    stopping = True
+                    continue
+                batch.append(item)
+
+            await self._flush(batch)
+
+        # Сообщения, пришедшие в очередь после сигнала остановки
+        while not self._queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not _STOP:
+                    batch.append(item)
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: list[tuple[dict, asyncio.Future]]):
+        try:
+            ids = await self._write([values for values, _ in batch])
+        except Exception as exc:
+            if len(batch) > 1:
+                # Одна ошибочная строка (например, чат удален после проверки)
+                # не должна ронять весь пакет: повторяем по одному сообщению
+                logger.warning(f"Failed to flush {len(batch)} messages, retrying one by one", exc_info=True)
+                for item in batch:
+                    await self._flush([item])
+                return
+
+            logger.exception("Failed to write message")
+            _, future = batch[0]
+            if not future.done():
+                future.set_exception(exc)
+            return
+
+        for message_id, (values, future) in zip(ids, batch):
+            if not future.done():
+                future.set_result(Message(id=message_id, **values))
+
+    async def _write(self, rows: list[dict]) -> list[int]:
+        """Записывает пакет одной транзакцией и возвращает id в порядке ``rows``"""
+        counts: dict[int, int] = {}
+        for values in rows:
+            counts[values["chat_id"]] = counts.get(values["chat_id"], 0) + 1
+        # Последнее сообщение каждого чата в пакете (индекс в rows)
+        latest = {values["chat_id"]: index for index, values in enumerate(rows)}
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                insert(Message).returning(Message.id, sort_by_parameter_order=True),
+                rows
+            )
+            ids = result.scalars().all()
+
+            chats = Chat.__table__
+            await db.execute(
+                chats.update()
+                .where(chats.c.id == bindparam("b_chat_id"))
+                .values(message_count=chats.c.message_count + bindparam("b_count")),
+                [{"b_chat_id": chat_id, "b_count": count} for chat_id, count in counts.items()]
+            )
+            for chat_id, index in latest.items():
+                values = rows[index]
+                await chat_summary_service.record_message(
+                    db, chat_id, ids[index], values["sender_id"], values["content"], values["created_at"]
+                )
+
+            # Свои сообщения считаются прочитанными
+            read_markers: dict[tuple[int, int], int] = {}
+            for message_id, values in zip(ids, rows):
+                read_markers[(values["chat_id"], values["sender_id"])] = message_id
+            participants = ChatParticipant.__table__
+            await db.execute(
+                participants.update()
+                .where((participants.c.chat_id == bindparam("b_chat_id"))
+                       & (participants.c.user_id == bindparam("b_user_id")))
+                .values(last_read_message_id=func.greatest(
+                    func.coalesce(participants.c.last_read_message_id, 0), bindparam("b_message_id")
+                )),
+                [{"b_chat_id": chat_id, "b_user_id": user_id, "b_message_id": message_id}
+                 for (chat_id, user_id), message_id in read_markers.items()]
+            )
+            await db.commit()
+
+        return ids
+
+
+message_batcher = MessageBatcher(
+    batch_size=settings.MESSAGE_BATCH_SIZE,
+    flush_interval=settings.MESSAGE_BATCH_INTERVAL_MS / 1000
+)
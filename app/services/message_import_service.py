@@ -0,0 +1,170 @@
+import asyncio
+import csv
+import itertools
+import json
+import logging
+import time
+from datetime import datetime, UTC
+from typing import Iterator, NamedTuple, TextIO
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, func, literal, update, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models import ChatParticipant, Chat
+from app.services import chat_summary_service
+
+logger = logging.getLogger(__name__)
+
+IMPORT_COLUMNS = ["chat_id", "sender_id", "content", "created_at"]
+# Сколько причин отбраковки возвращать в отчете
+MAX_REPORTED_ERRORS = 20
+
+
+class InvalidRecord(NamedTuple):
+    line_number: int
+    reason: str
+
+
+def _parse_record(data: dict) -> tuple:
+    created_at = data.get("created_at")
+    if created_at:
+        created_at = datetime.fromisoformat(created_at)
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=UTC)
+    else:
+        created_at = datetime.now(UTC)
+
+    if data["content"] is None:
+        raise ValueError("content is empty")
+
+    return int(data["chat_id"]), int(data["sender_id"]), str(data["content"]), created_at
+
+
+def _parse_ndjson_line(line: str) -> dict:
+    data = json.loads(line)
+    if not isinstance(data, dict):
+        raise TypeError("record must be an object")
+    return data
+
+
+def read_records(file: TextIO, fmt: str) -> Iterator[tuple | InvalidRecord]:
+    """Читает записи сообщений из NDJSON или CSV (с заголовком) лениво, построчно.
+
+    Некорректная запись не прерывает чтение: вместо нее возвращается
+    ``InvalidRecord`` с номером записи и причиной.
+    """
+    if fmt == "ndjson":
+        rows = ((line_number, line) for line_number, line in enumerate(file, start=1) if line.strip())
+        parse = lambda line: _parse_record(_parse_ndjson_line(line))
+    elif fmt == "csv":
+        rows = enumerate(csv.DictReader(file), start=1)
+        parse = _parse_record
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Format must be 'ndjson' or 'csv'"
+        )
+
+    for line_number, row in rows:
+        try:
+            yield parse(row)
+        except (KeyError, TypeError, ValueError) as exc:
+            yield InvalidRecord(line_number, f"{type(exc).__name__}: {exc}")
+
+
+async def import_messages(file: TextIO, fmt: str, chunk_size: int | None = None):
+    """Загружает сообщения через COPY порциями по ``chunk_size`` строк.
+
+    Каждая порция - отдельная транзакция: членство отправителей проверяется
+    одним запросом на порцию, строки чужих отправителей и некорректные записи
+    отбрасываются и считаются в ``rejected``, счетчики чатов обновляются
+    вместе с COPY. Если импорт все же прерывается, ошибка содержит число уже
+    зафиксированных строк, чтобы повторный запуск не дублировал их вслепую.
+    """
+    chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+    records = read_records(file, fmt)
+    known_members: set[tuple[int, int]] = set()
+    imported = 0
+    rejected = 0
+    errors: list[str] = []
+    started = time.perf_counter()
+
+    try:
+        async with engine.connect() as conn:
+            while True:
+                # Чтение и разбор файла не должны блокировать цикл событий
+                chunk = await asyncio.to_thread(list, itertools.islice(records, chunk_size))
+                if not chunk:
+                    break
+
+                invalid = [record for record in chunk if isinstance(record, InvalidRecord)]
+                if invalid:
+                    rejected += len(invalid)
+                    for record in invalid[:MAX_REPORTED_ERRORS - len(errors)]:
+                        errors.append(f"Invalid record {record.line_number}: {record.reason}")
+                    chunk = [record for record in chunk if not isinstance(record, InvalidRecord)]
+
+                pairs = {(chat_id, sender_id) for chat_id, sender_id, _, _ in chunk} - known_members
+                if pairs:
+                    # Пары передаются двумя массивами: IN по кортежам занимает два
+                    # параметра на пару и упирается в лимит asyncpg в 32767
+                    chat_ids, user_ids = zip(*pairs)
+                    requested = func.unnest(
+                        literal(list(chat_ids), ARRAY(Integer)), literal(list(user_ids), ARRAY(Integer))
+                    ).table_valued("chat_id", "user_id").render_derived()
+                    result = await conn.execute(
+                        select(ChatParticipant.chat_id, ChatParticipant.user_id)
+                        .join(
+                            requested,
+                            (ChatParticipant.chat_id == requested.c.chat_id)
+                            & (ChatParticipant.user_id == requested.c.user_id)
+                        )
+                    )
+                    known_members.update((chat_id, user_id) for chat_id, user_id in result.all())
+
+                valid = [record for record in chunk if (record[0], record[1]) in known_members]
+                rejected += len(chunk) - len(valid)
+                if not valid:
+                    continue
+
+                counts: dict[int, int] = {}
+                for chat_id, _, _, _ in valid:
+                    counts[chat_id] = counts.get(chat_id, 0) + 1
+                for chat_id, count in counts.items():
+                    await conn.execute(
+                        update(Chat)
+                        .where(Chat.id == chat_id)
+                        .values(message_count=Chat.message_count + count)
+                    )
+
+                raw_connection = await conn.get_raw_connection()
+                await raw_connection.driver_connection.copy_records_to_table(
+                    "messages", records=valid, columns=IMPORT_COLUMNS
+                )
+                for chat_id in counts:
+                    await chat_summary_service.refresh_summary(conn, chat_id)
+                await conn.commit()
+
+                imported += len(valid)
+                logger.info(f"Imported {imported} messages ({rejected} rejected)")
+    except HTTPException:
+        raise
+    except Exception:
+        # Зафиксированные порции остаются в БД: сообщаем, сколько строк уже загружено
+        logger.exception(f"Import interrupted after {imported} messages")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"message": "Import interrupted", "imported": imported, "rejected": rejected, "errors": errors}
+        )
+
+    elapsed = time.perf_counter() - started
+    return {
+        "imported": imported,
+        "rejected": rejected,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(imported / elapsed) if elapsed else imported
+    }
@@ -1,40 +1,83 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, tuple_, update, exists
 from fastapi import HTTPException, status
+from typing import Optional, AsyncIterator
+from datetime import datetime
+import json
 
-from app.models import Message, ChatParticipant, Chat
+from app.core.broadcast import broadcast
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.pagination import pack_cursor, unpack_cursor, invalid_cursor
+from app.core.hub import hub
+from app.models import Message, ChatParticipant, Chat, ChatSummary
+from app.models.message import SEARCH_CONFIG
+from app.schemas.message_schemas import MessageResponse
+from app.services import chat_summary_service
+from app.services import membership_cache
+from app.services.message_batcher import message_batcher
+
+
+def encode_cursor(message: Message) -> str:
+    """Кодирует позицию сообщения (created_at, id) в непрозрачный курсор"""
+    return pack_cursor(message.created_at.isoformat(), message.id)
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Декодирует курсор обратно в пару (created_at, id)"""
+    created_at, message_id = unpack_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(created_at), int(message_id)
+    except ValueError:
+        raise invalid_cursor()
+
+
+def encode_search_cursor(rank: float, message_id: int) -> str:
+    """Кодирует позицию результата поиска (rank, id) в непрозрачный курсор"""
+    return pack_cursor(repr(rank), message_id)
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, int]:
+    """Декодирует курсор поиска обратно в пару (rank, id)"""
+    rank, message_id = unpack_cursor(cursor, 2)
+    try:
+        return float(rank), int(message_id)
+    except ValueError:
+        raise invalid_cursor()
+
+
+def message_event(event_type: str, message: Message) -> dict:
+    """Событие для рассылки подписчикам чата"""
+    return {
+        "type": event_type,
+        "message": MessageResponse.model_validate(message).model_dump(mode="json")
+    }
 
 
 async def ensure_chat_member(db: AsyncSession, chat_id: int, user_id: int):
-    """Проверяет, что пользователь является участником чата"""
-    result = await db.execute(
-        select(ChatParticipant).where(
-            (ChatParticipant.chat_id == chat_id) & (ChatParticipant.user_id == user_id)
-        )
-    )
-    participant = result.scalar_one_or_none()
+    """Проверяет, что пользователь является участником чата, и возвращает его роль"""
+    role = await membership_cache.get_member_role(db, chat_id, user_id)
 
-    if not participant:
+    if role is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not a member of this chat"
         )
 
-    return participant
+    return role
 
 
 async def ensure_chat_exists(db: AsyncSession, chat_id: int):
-    """Проверяет, что чат существует"""
-    result = await db.execute(select(Chat).where(Chat.id == chat_id))
-    chat = result.scalar_one_or_none()
+    """Проверяет, что чат существует, и возвращает признак группового чата"""
+    is_group = await membership_cache.get_chat_is_group(db, chat_id)
 
-    if not chat:
+    if is_group is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chat not found"
         )
 
-    return chat
+    return is_group
 
 
 async def send_message(
@@ -57,6 +100,13 @@ async def send_message(
             detail="Message content cannot be empty"
         )
 
+    if settings.MESSAGE_BATCH_ENABLED:
+        # Пакетный режим: соединение не держим, пока сообщение ждет записи
+        await db.close()
+        message = await message_batcher.submit(chat_id, sender_id, content.strip())
+        await broadcast.publish(chat_id, message_event("message.created", message))
+        return message
+
     # Создаем сообщение
     message = Message(
         chat_id=chat_id,
@@ -64,9 +114,23 @@ async def send_message(
         content=content.strip()
     )
     db.add(message)
+    await db.flush()
+    # Счетчик сообщений и сводка чата обновляются в той же транзакции
+    await db.execute(
+        update(Chat)
+        .where(Chat.id == chat_id)
+        .values(message_count=Chat.message_count + 1)
+    )
+    await chat_summary_service.record_message(
+        db, chat_id, message.id, sender_id, message.content, message.created_at
+    )
+    # Свои сообщения считаются прочитанными
+    await _advance_read_marker(db, chat_id, sender_id, message.id)
     await db.commit()
     await db.refresh(message)
 
+    await broadcast.publish(chat_id, message_event("message.created", message))
+
     return message
 
 
@@ -75,9 +139,27 @@ async def get_chat_messages(
     chat_id: int,
     user_id: int,
     skip: int = 0,
-    limit: int = 50
+    limit: int = 50,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    exact: bool = False
 ):
-    """Получить сообщения чата с пагинацией"""
+    """Получить сообщения чата с пагинацией.
+
+    Основной режим - курсорный (keyset) по паре (created_at, id): ``before``
+    возвращает более старые сообщения, ``after`` - более новые, без курсора
+    возвращается последняя страница. Стоимость страницы не зависит от глубины
+    прокрутки. ``skip`` оставлен только для старых клиентов.
+
+    ``total`` берется из счетчика ``Chat.message_count``; ``exact=True``
+    пересчитывает его через COUNT(*).
+    """
+    if before and after:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either 'before' or 'after', not both"
+        )
+
     # Проверяем, что чат существует
     await ensure_chat_exists(db, chat_id)
 
@@ -85,29 +167,252 @@ async def get_chat_messages(
     await ensure_chat_member(db, chat_id, user_id)
 
     # Получаем общее количество сообщений
-    total_result = await db.execute(
-        select(func.count(Message.id)).where(Message.chat_id == chat_id)
-    )
+    if exact:
+        total_result = await db.execute(
+            select(func.count(Message.id)).where(Message.chat_id == chat_id)
+        )
+    else:
+        total_result = await db.execute(
+            select(Chat.message_count).where(Chat.id == chat_id)
+        )
     total = total_result.scalar() or 0
 
-    # Получаем сообщения с пагинацией, сортировка по дате создания (новые сначала)
+    query = select(Message).where(Message.chat_id == chat_id)
+    position = tuple_(Message.created_at, Message.id)
+
+    if after:
+        # Более новые сообщения: идем по индексу вперед от курсора
+        result = await db.execute(
+            query
+            .where(position > tuple_(*decode_cursor(after)))
+            .order_by(Message.created_at.asc(), Message.id.asc())
+            .limit(limit + 1)
+        )
+        messages = list(result.scalars().all())
+        has_newer = len(messages) > limit
+        messages = messages[:limit]
+        has_older = True
+    else:
+        # Более старые сообщения (или последняя страница): идем по индексу назад
+        if before:
+            query = query.where(position < tuple_(*decode_cursor(before)))
+        else:
+            # Устаревший режим со смещением, оставлен для совместимости
+            query = query.offset(skip)
+
+        result = await db.execute(
+            query
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(limit + 1)
+        )
+        messages = list(result.scalars().all())
+        has_older = len(messages) > limit
+        # Переворачиваем список, чтобы старые сообщения были первыми
+        messages = list(reversed(messages[:limit]))
+        has_newer = before is not None or skip > 0
+
+    return {
+        "messages": messages,
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "next_cursor": encode_cursor(messages[-1]) if messages and has_newer else None,
+        "prev_cursor": encode_cursor(messages[0]) if messages and has_older else None
+    }
+
+
+async def _advance_read_marker(db: AsyncSession, chat_id: int, user_id: int, message_id: int) -> Optional[int]:
+    # Маркер прочтения только двигается вперед
     result = await db.execute(
+        update(ChatParticipant)
+        .where((ChatParticipant.chat_id == chat_id) & (ChatParticipant.user_id == user_id))
+        .values(last_read_message_id=func.greatest(
+            func.coalesce(ChatParticipant.last_read_message_id, 0), message_id
+        ))
+        .returning(ChatParticipant.last_read_message_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def mark_chat_read(
+    db: AsyncSession,
+    chat_id: int,
+    user_id: int,
+    message_id: Optional[int] = None
+):
+    """Отметить чат прочитанным до указанного сообщения (по умолчанию - до последнего)"""
+    # Проверяем, что пользователь является участником чата
+    await ensure_chat_member(db, chat_id, user_id)
+
+    if message_id is None:
+        result = await db.execute(
+            select(ChatSummary.last_message_id).where(ChatSummary.chat_id == chat_id)
+        )
+        message_id = result.scalar_one_or_none()
+    else:
+        result = await db.execute(
+            select(Message.id).where((Message.id == message_id) & (Message.chat_id == chat_id))
+        )
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Message not found"
+            )
+
+    if message_id is None:
+        result = await db.execute(
+            select(ChatParticipant.last_read_message_id).where(
+                (ChatParticipant.chat_id == chat_id) & (ChatParticipant.user_id == user_id)
+            )
+        )
+        return {"chat_id": chat_id, "last_read_message_id": result.scalar_one_or_none()}
+
+    last_read_message_id = await _advance_read_marker(db, chat_id, user_id, message_id)
+    await db.commit()
+
+    return {"chat_id": chat_id, "last_read_message_id": last_read_message_id}
+
+
+async def get_messages_since(
+    db: AsyncSession,
+    chat_id: int,
+    user_id: int,
+    message_id: int,
+    wait: float = 0,
+    limit: int = 50
+):
+    """Long-poll: сообщения чата новее ``message_id``.
+
+    Если новых сообщений нет, запрос ждет до ``wait`` секунд сигнала о новом
+    сообщении и затем повторяет выборку один раз.
+    """
+    # Проверяем, что чат существует
+    await ensure_chat_exists(db, chat_id)
+
+    # Проверяем, что пользователь является участником чата
+    await ensure_chat_member(db, chat_id, user_id)
+
+    query = (
         select(Message)
-        .where(Message.chat_id == chat_id)
-        .order_by(Message.created_at.desc())
-        .offset(skip)
+        .where((Message.chat_id == chat_id) & (Message.id > message_id))
+        .order_by(Message.id.asc())
         .limit(limit)
     )
-    messages = result.scalars().all()
 
-    # Переворачиваем список, чтобы старые сообщения были первыми
-    messages = list(reversed(messages))
+    new_message = hub.new_message_event(chat_id)
+    try:
+        result = await db.execute(query)
+        messages = result.scalars().all()
+
+        if messages or wait <= 0:
+            return messages
+
+        # Освобождаем соединение с БД на время ожидания
+        await db.close()
+
+        if not await hub.wait_for_message(new_message, wait):
+            return []
+    finally:
+        hub.release_message_event(chat_id, new_message)
+
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def export_chat_messages(
+    db: AsyncSession,
+    chat_id: int,
+    user_id: int
+) -> AsyncIterator[str]:
+    """Экспорт всей истории чата в NDJSON.
+
+    Права проверяются сразу, а строки читаются серверным курсором порциями
+    по ``EXPORT_BATCH_SIZE`` в отдельной сессии, поэтому память не растет
+    с размером чата и первые байты уходят до окончания запроса.
+    """
+    # Проверяем, что чат существует
+    await ensure_chat_exists(db, chat_id)
+
+    # Проверяем, что пользователь является участником чата
+    await ensure_chat_member(db, chat_id, user_id)
+
+    return _stream_chat_messages(chat_id)
+
+
+async def _stream_chat_messages(chat_id: int) -> AsyncIterator[str]:
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(Message.id, Message.chat_id, Message.sender_id, Message.content, Message.created_at)
+            .where(Message.chat_id == chat_id)
+            .order_by(Message.created_at.asc(), Message.id.asc())
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+
+        async for rows in result.partitions():
+            yield "".join(
+                json.dumps({
+                    "id": message_id,
+                    "chat_id": message_chat_id,
+                    "sender_id": sender_id,
+                    "content": content,
+                    "created_at": created_at.isoformat()
+                }, ensure_ascii=False) + "\n"
+                for message_id, message_chat_id, sender_id, content, created_at in rows
+            )
+
+
+async def search_messages(
+    db: AsyncSession,
+    user_id: int,
+    query_text: str,
+    chat_id: Optional[int] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None
+):
+    """Полнотекстовый поиск по сообщениям чатов пользователя.
+
+    Использует GIN-индекс по ``Message.search_vector``, результаты
+    упорядочены по ``ts_rank``; проверка членства выполняется в том же запросе.
+    """
+    if not query_text or not query_text.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query cannot be empty"
+        )
+
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query_text)
+    rank = func.ts_rank(Message.search_vector, ts_query)
+
+    query = (
+        select(Message, rank.label("rank"))
+        .where(Message.search_vector.op("@@")(ts_query))
+        .where(exists().where(
+            (ChatParticipant.chat_id == Message.chat_id) & (ChatParticipant.user_id == user_id)
+        ))
+    )
+
+    if chat_id is not None:
+        query = query.where(Message.chat_id == chat_id)
+
+    if cursor:
+        query = query.where(tuple_(rank, Message.id) < tuple_(*decode_search_cursor(cursor)))
+
+    result = await db.execute(
+        query
+        .order_by(rank.desc(), Message.id.desc())
+        .limit(limit + 1)
+    )
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_message, last_rank = rows[-1]
+        next_cursor = encode_search_cursor(last_rank, last_message.id)
 
     return {
-        "messages": messages,
-        "total": total,
-        "skip": skip,
-        "limit": limit
+        "messages": [message for message, _ in rows],
+        "next_cursor": next_cursor
     }
 
 
@@ -165,9 +470,12 @@ async def update_message(
     # Обновляем сообщение
     message.content = new_content.strip()
     db.add(message)
+    await chat_summary_service.update_preview(db, message)
     await db.commit()
     await db.refresh(message)
 
+    await broadcast.publish(message.chat_id, message_event("message.updated", message))
+
     return message
 
 
@@ -194,6 +502,18 @@ async def delete_message(
         )
 
     await db.delete(message)
+    await db.flush()
+    await db.execute(
+        update(Chat)
+        .where(Chat.id == message.chat_id)
+        .values(message_count=Chat.message_count - 1)
+    )
+    await chat_summary_service.refresh_summary(db, message.chat_id)
     await db.commit()
 
+    await broadcast.publish(message.chat_id, {
+        "type": "message.deleted",
+        "message": {"id": message_id, "chat_id": message.chat_id}
+    })
+
     return {"message": "Message deleted successfully"}
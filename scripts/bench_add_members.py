@@ -0,0 +1,129 @@
+"""Benchmark adding many members to a group chat.
+
+Seeds an owner with --size accepted friends, then adds them all to a fresh
+group twice: once with per-row ORM inserts after an "already in group"
+SELECT, once with the single INSERT ... SELECT used by the services:
+
+    python -m scripts.bench_add_members --size 5000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import select, text
+
+from app.core.database import engine, AsyncSessionLocal
+from app.models import ChatParticipant
+from app.models.enums import ChatParticipantRole
+from app.services.chat_group_service import add_chat_participants
+from app.services.friend_cache import filter_friends
+
+
+async def seed(size: int) -> tuple[int, list[int]]:
+    prefix = f"bench-{uuid.uuid4().hex}"
+    async with engine.begin() as conn:
+        owner_id = (await conn.execute(
+            text("INSERT INTO users (email, role) VALUES (:email, 'USER') RETURNING id"),
+            {"email": f"{prefix}-owner@example.com"}
+        )).scalar_one()
+        friend_ids = (await conn.execute(
+            text(
+                "INSERT INTO users (email, role) "
+                "SELECT :prefix || '-' || i || '@example.com', 'USER' FROM generate_series(1, :size) AS i "
+                "RETURNING id"
+            ),
+            {"prefix": prefix, "size": size}
+        )).scalars().all()
+        await conn.execute(
+            text(
+                "INSERT INTO friendships (sender_id, receiver_id, status) "
+                "SELECT :owner_id, id, 'ACCEPTED' FROM unnest(CAST(:ids AS integer[])) AS id"
+            ),
+            {"owner_id": owner_id, "ids": friend_ids}
+        )
+    return owner_id, list(friend_ids)
+
+
+async def create_group(owner_id: int) -> int:
+    async with engine.begin() as conn:
+        chat_id = (await conn.execute(
+            text("INSERT INTO chats (title, is_group) VALUES ('members benchmark', true) RETURNING id")
+        )).scalar_one()
+        await conn.execute(
+            text("INSERT INTO chat_participants (chat_id, user_id, role) VALUES (:chat_id, :user_id, 'CREATOR')"),
+            {"chat_id": chat_id, "user_id": owner_id}
+        )
+    return chat_id
+
+
+async def add_orm(chat_id: int, owner_id: int, friend_ids: list[int]) -> int:
+    # Прежний путь: проверка дружбы и членства отдельными запросами, затем db.add на каждого
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(text(
+            "SELECT CASE WHEN sender_id = :owner_id THEN receiver_id ELSE sender_id END FROM friendships "
+            "WHERE status = 'ACCEPTED' AND (sender_id = :owner_id OR receiver_id = :owner_id)"
+        ), {"owner_id": owner_id})
+        valid_friends_ids = set(result.scalars().all())
+        valid_to_add = [fid for fid in friend_ids if fid in valid_friends_ids]
+
+        result = await db.execute(select(ChatParticipant.user_id).where((ChatParticipant.chat_id == chat_id)
+                                                                & (ChatParticipant.user_id.in_(valid_to_add))))
+        already_in_group = set(result.scalars().all())
+        to_add = [fid for fid in valid_to_add if fid not in already_in_group]
+
+        for friend_id in to_add:
+            db.add(ChatParticipant(chat_id=chat_id, user_id=friend_id, role=ChatParticipantRole.PARTICIPANT))
+        await db.commit()
+        return len(to_add)
+
+
+async def add_set_based(chat_id: int, owner_id: int, friend_ids: list[int]) -> int:
+    async with AsyncSessionLocal() as db:
+        added = await add_chat_participants(db, chat_id, await filter_friends(db, owner_id, friend_ids))
+        await db.commit()
+        return len(added)
+
+
+async def cleanup(owner_id: int, friend_ids: list[int], chat_ids: list[int]):
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM chats WHERE id = ANY(CAST(:ids AS integer[]))"), {"ids": chat_ids})
+        await conn.execute(
+            text("DELETE FROM users WHERE id = ANY(CAST(:ids AS integer[]))"),
+            {"ids": [owner_id, *friend_ids]}
+        )
+
+
+async def bench(size: int):
+    owner_id, friend_ids = await seed(size)
+    chat_ids = []
+
+    try:
+        for name, add in (("orm", add_orm), ("set", add_set_based)):
+            chat_id = await create_group(owner_id)
+            chat_ids.append(chat_id)
+
+            started = time.perf_counter()
+            added = await add(chat_id, owner_id, friend_ids)
+            elapsed = time.perf_counter() - started
+
+            started = time.perf_counter()
+            await add(chat_id, owner_id, friend_ids)
+            repeat_elapsed = time.perf_counter() - started
+
+            print(f"{name:4} added={added} elapsed={elapsed * 1000:.0f}ms "
+                  f"repeat (all present)={repeat_elapsed * 1000:.0f}ms")
+    finally:
+        await cleanup(owner_id, friend_ids, chat_ids)
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(bench(args.size))
+
+
+if __name__ == "__main__":
+    main()
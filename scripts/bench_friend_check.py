@@ -0,0 +1,112 @@
+"""Benchmark validating a handful of ids against a large friend list.
+
+Seeds a user with --size accepted friends (10k by default) and checks
+--candidates ids (half friends, half strangers) the old way, by loading the
+full friend list, and with friend_cache.filter_friends, cold and warm:
+
+    python -m scripts.bench_friend_check --size 10000 --candidates 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import select, text
+
+from app.core.database import engine, AsyncSessionLocal
+from app.services import friend_cache
+from app.models import User
+
+
+async def seed(size: int, strangers: int) -> tuple[int, list[int], list[int]]:
+    prefix = f"bench-{uuid.uuid4().hex}"
+    async with engine.begin() as conn:
+        owner_id = (await conn.execute(
+            text("INSERT INTO users (email, role) VALUES (:email, 'USER') RETURNING id"),
+            {"email": f"{prefix}-owner@example.com"}
+        )).scalar_one()
+        user_ids = (await conn.execute(
+            text(
+                "INSERT INTO users (email, role) "
+                "SELECT :prefix || '-' || i || '@example.com', 'USER' FROM generate_series(1, :total) AS i "
+                "RETURNING id"
+            ),
+            {"prefix": prefix, "total": size + strangers}
+        )).scalars().all()
+        friend_ids, stranger_ids = list(user_ids[:size]), list(user_ids[size:])
+        await conn.execute(
+            text(
+                "INSERT INTO friendships (sender_id, receiver_id, status) "
+                "SELECT CASE WHEN id % 2 = 0 THEN :owner_id ELSE id END, "
+                "CASE WHEN id % 2 = 0 THEN id ELSE :owner_id END, 'ACCEPTED' "
+                "FROM unnest(CAST(:ids AS integer[])) AS id"
+            ),
+            {"owner_id": owner_id, "ids": friend_ids}
+        )
+        await conn.execute(text("ANALYZE friendships"))
+    return owner_id, friend_ids, stranger_ids
+
+
+async def check_full_list(owner_id: int, candidate_ids: list[int]) -> list[int]:
+    async with AsyncSessionLocal() as db:
+        # Прежний путь: все друзья целиком как объекты User
+        friend_ids = friend_cache.friend_ids_query(owner_id).subquery()
+        result = await db.execute(select(User).join(friend_ids, friend_ids.c.friend_id == User.id))
+        valid_friends_ids = {f.id for f in result.scalars().all()}
+        return [cid for cid in candidate_ids if cid in valid_friends_ids]
+
+
+async def check_cold(owner_id: int, candidate_ids: list[int]) -> list[int]:
+    async with AsyncSessionLocal() as db:
+        return await friend_cache.filter_friends(db, owner_id, candidate_ids)
+
+
+async def check_warm(owner_id: int, candidate_ids: list[int]) -> list[int]:
+    async with AsyncSessionLocal() as db:
+        await friend_cache.get_friend_ids(db, owner_id)
+        return await friend_cache.filter_friends(db, owner_id, candidate_ids)
+
+
+async def cleanup(owner_id: int, user_ids: list[int]):
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("DELETE FROM users WHERE id = ANY(CAST(:ids AS integer[]))"),
+            {"ids": [owner_id, *user_ids]}
+        )
+
+
+async def bench(size: int, candidates: int, repeat: int):
+    half = candidates // 2
+    owner_id, friend_ids, stranger_ids = await seed(size, candidates - half)
+    candidate_ids = friend_ids[::max(1, size // max(1, half))][:half] + stranger_ids
+
+    try:
+        for name, check in (("full list", check_full_list), ("cold cache", check_cold),
+                            ("warm cache", check_warm)):
+            timings = []
+            for _ in range(repeat):
+                friend_cache.forget(owner_id)
+                if check is check_warm:
+                    await check(owner_id, candidate_ids)
+                started = time.perf_counter()
+                valid = await check(owner_id, candidate_ids)
+                timings.append(time.perf_counter() - started)
+            print(f"{name:10} friends={size} candidates={len(candidate_ids)} valid={len(valid)} "
+                  f"median={statistics.median(timings) * 1000:.1f}ms max={max(timings) * 1000:.1f}ms")
+    finally:
+        await cleanup(owner_id, friend_ids + stranger_ids)
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(bench(args.size, args.candidates, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark password verification throughput and event-loop stalls.
+
+Compares verifying inline on the event loop with the bounded bcrypt pool
+used by /auth/login, while a ticker measures how late the loop wakes up:
+
+    python -m scripts.bench_login --logins 64 --concurrency 16
+"""
+import argparse
+import asyncio
+import time
+
+from app.auth.hashing import PasswordHasher, pwd_context
+from app.core.config import settings
+
+PASSWORD = "correct horse battery staple"
+
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def run(mode: str, hashed: str, logins: int, concurrency: int, hasher: PasswordHasher) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            if mode == "inline":
+                assert pwd_context.verify(PASSWORD, hashed)
+            else:
+                is_valid, _ = await hasher.verify_and_update(PASSWORD, hashed)
+                assert is_valid
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    worst_lag = await lag_task
+
+    print(f"{mode:6} logins={logins} elapsed={elapsed:.2f}s "
+          f"rate={logins / elapsed:.1f}/s worst_loop_lag={worst_lag * 1000:.0f}ms")
+
+
+async def bench(logins: int, concurrency: int, workers: int):
+    hashed = pwd_context.hash(PASSWORD)
+    hasher = PasswordHasher(workers, max_queue=logins)
+    print(f"bcrypt rounds={settings.BCRYPT_ROUNDS} pool workers={workers}")
+    await run("inline", hashed, logins, concurrency, hasher)
+    await run("pool", hashed, logins, concurrency, hasher)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS)
+    args = parser.parse_args()
+    asyncio.run(bench(args.logins, args.concurrency, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark message search on a synthetic corpus.
+
+Seeds a throwaway chat with --size messages (one million by default), runs
+the search service for a few queries and removes the chat afterwards:
+
+    python -m scripts.bench_search --size 1000000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.core.database import engine, AsyncSessionLocal
+from app.services.message_service import search_messages
+
+WORDS = [
+    "встреча", "завтра", "проект", "отчет", "кофе", "футбол", "concert", "deadline",
+    "release", "погода", "дорога", "билеты", "museum", "pizza", "собрание", "ужин",
+]
+QUERIES = ["встреча завтра", "release", "кофе OR pizza", "\"отчет проект\"", "museum -билеты"]
+
+
+async def seed(size: int) -> tuple[int, int]:
+    async with engine.begin() as conn:
+        user_id = (await conn.execute(
+            text("INSERT INTO users (email, role) VALUES (:email, 'USER') RETURNING id"),
+            {"email": f"bench-{uuid.uuid4().hex}@example.com"}
+        )).scalar_one()
+        chat_id = (await conn.execute(
+            text("INSERT INTO chats (title, is_group) VALUES ('search benchmark', true) RETURNING id")
+        )).scalar_one()
+        await conn.execute(
+            text("INSERT INTO chat_participants (chat_id, user_id, role) VALUES (:chat_id, :user_id, 'CREATOR')"),
+            {"chat_id": chat_id, "user_id": user_id}
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO messages (chat_id, sender_id, content, created_at) "
+                "SELECT :chat_id, :user_id, "
+                "(CAST(:words AS text[]))[1 + (i * 7) % :n] || ' ' || (CAST(:words AS text[]))[1 + (i * 13) % :n] || ' ' || "
+                "(CAST(:words AS text[]))[1 + (i * 31) % :n] || ' #' || i, "
+                "now() - make_interval(secs => :size - i) "
+                "FROM generate_series(1, :size) AS i"
+            ),
+            {"chat_id": chat_id, "user_id": user_id, "words": WORDS, "n": len(WORDS), "size": size}
+        )
+        await conn.execute(text("ANALYZE messages"))
+    return user_id, chat_id
+
+
+async def cleanup(user_id: int, chat_id: int):
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM chats WHERE id = :id"), {"id": chat_id})
+        await conn.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+
+
+async def bench(size: int, repeat: int, pages: int):
+    started = time.perf_counter()
+    user_id, chat_id = await seed(size)
+    print(f"seeded {size} messages in {time.perf_counter() - started:.1f}s")
+
+    try:
+        for query in QUERIES:
+            timings = []
+            for _ in range(repeat):
+                cursor = None
+                async with AsyncSessionLocal() as db:
+                    for _ in range(pages):
+                        page_started = time.perf_counter()
+                        result = await search_messages(db, user_id, query, limit=20, cursor=cursor)
+                        timings.append(time.perf_counter() - page_started)
+                        cursor = result["next_cursor"]
+                        if cursor is None:
+                            break
+            print(f"{query!r:24} pages={len(timings)} "
+                  f"median={statistics.median(timings) * 1000:.1f}ms max={max(timings) * 1000:.1f}ms")
+    finally:
+        await cleanup(user_id, chat_id)
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(bench(args.size, args.repeat, args.pages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Publish events through a broadcast backend and wait for them to come back.
+
+Checks that the configured backend delivers every event and reports latency:
+
+    python -m scripts.broadcast_loopback --backend postgres --count 1000
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.broadcast import create_broadcast
+
+LOOPBACK_CHAT_ID = 0
+
+
+async def loopback(backend_name: str, count: int, timeout: float):
+    backend = create_broadcast(backend_name)
+    received = asyncio.Queue()
+    backend.add_listener(lambda chat_id, event: received.put_nowait((chat_id, event, time.perf_counter())))
+    await backend.connect()
+
+    try:
+        sent_at = {}
+        started = time.perf_counter()
+        for i in range(count):
+            sent_at[i] = time.perf_counter()
+            await backend.publish(LOOPBACK_CHAT_ID, {"type": "loopback", "message": {"id": i, "chat_id": LOOPBACK_CHAT_ID}})
+
+        latencies = []
+        while len(latencies) < count:
+            chat_id, event, arrived = await asyncio.wait_for(received.get(), timeout)
+            assert chat_id == LOOPBACK_CHAT_ID, chat_id
+            latencies.append(arrived - sent_at[event["message"]["id"]])
+        elapsed = time.perf_counter() - started
+    finally:
+        await backend.disconnect()
+
+    latencies.sort()
+    print(f"backend={backend_name} events={count} elapsed={elapsed:.3f}s rate={count / elapsed:.0f}/s")
+    print(f"latency p50={latencies[len(latencies) // 2] * 1000:.2f}ms "
+          f"p99={latencies[int(len(latencies) * 0.99)] * 1000:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="memory", choices=["memory", "postgres"])
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(loopback(args.backend, args.count, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
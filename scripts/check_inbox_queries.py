@@ -0,0 +1,117 @@
+"""Check that the inbox costs the same number of queries for 1 and N chats.
+
+Seeds two users, one with a single private chat and one with --chats private
+chats, counts the statements get_user_chats executes for each through a
+before_cursor_execute listener and fails if the counts differ:
+
+    python -m scripts.check_inbox_queries --chats 500
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+
+from sqlalchemy import event, text
+
+from app.core.database import engine, AsyncSessionLocal
+from app.services.chat_service import get_user_chats
+
+
+async def seed_owner(prefix: str, chats: int) -> tuple[int, list[int], list[int]]:
+    """Пользователь с ``chats`` приватными чатами; каждый собеседник - отдельный пользователь"""
+    async with engine.begin() as conn:
+        owner_id = (await conn.execute(
+            text("INSERT INTO users (email, name, role) VALUES (:email, 'owner', 'USER') RETURNING id"),
+            {"email": f"{prefix}-owner@example.com"}
+        )).scalar_one()
+        other_ids = (await conn.execute(
+            text(
+                "INSERT INTO users (email, name, role) "
+                "SELECT :prefix || '-' || i || '@example.com', 'friend ' || i, 'USER' "
+                "FROM generate_series(1, :chats) AS i RETURNING id"
+            ),
+            {"prefix": prefix, "chats": chats}
+        )).scalars().all()
+        chat_ids = (await conn.execute(
+            text(
+                "INSERT INTO chats (is_group, private_low_user_id, private_high_user_id) "
+                "SELECT false, LEAST(:owner_id, id), GREATEST(:owner_id, id) "
+                "FROM unnest(CAST(:ids AS integer[])) AS id RETURNING id"
+            ),
+            {"owner_id": owner_id, "ids": list(other_ids)}
+        )).scalars().all()
+        await conn.execute(
+            text(
+                "INSERT INTO chat_participants (chat_id, user_id, role) "
+                "SELECT chat_id, user_id, 'PARTICIPANT' FROM unnest(CAST(:chat_ids AS integer[]), "
+                "CAST(:user_ids AS integer[])) AS pair(chat_id, user_id) "
+                "UNION ALL SELECT chat_id, :owner_id, 'PARTICIPANT' FROM unnest(CAST(:chat_ids AS integer[])) AS chat_id"
+            ),
+            {"owner_id": owner_id, "chat_ids": list(chat_ids), "user_ids": list(other_ids)}
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO messages (chat_id, sender_id, content) "
+                "SELECT chat_id, :owner_id, 'hello' FROM unnest(CAST(:chat_ids AS integer[])) AS chat_id"
+            ),
+            {"owner_id": owner_id, "chat_ids": list(chat_ids)}
+        )
+    return owner_id, list(other_ids), list(chat_ids)
+
+
+async def count_queries(user_id: int, limit: int) -> tuple[int, int]:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await get_user_chats(db, user_id, limit=limit)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    return len(statements), len(result["chats"])
+
+
+async def cleanup(user_ids: list[int], chat_ids: list[int]):
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM chats WHERE id = ANY(CAST(:ids AS integer[]))"), {"ids": chat_ids})
+        await conn.execute(text("DELETE FROM users WHERE id = ANY(CAST(:ids AS integer[]))"), {"ids": user_ids})
+
+
+async def check(chats: int) -> bool:
+    prefix = f"inbox-{uuid.uuid4().hex}"
+    single_owner, single_others, single_chats = await seed_owner(f"{prefix}-single", 1)
+    many_owner, many_others, many_chats = await seed_owner(f"{prefix}-many", chats)
+
+    try:
+        single_queries, single_rows = await count_queries(single_owner, limit=chats)
+        many_queries, many_rows = await count_queries(many_owner, limit=chats)
+    finally:
+        await cleanup(
+            [single_owner, *single_others, many_owner, *many_others],
+            single_chats + many_chats
+        )
+        await engine.dispose()
+
+    print(f"chats={single_rows} queries={single_queries}")
+    print(f"chats={many_rows} queries={many_queries}")
+    if single_queries != many_queries:
+        print("FAIL: query count grows with the number of chats")
+        return False
+    print("OK: query count is constant")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=500)
+    args = parser.parse_args()
+    if not asyncio.run(check(args.chats)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Print EXPLAIN ANALYZE plans for the hot service queries.
+
+Run it before and after ``alembic upgrade head`` to compare the plans:
+
+    python -m scripts.explain_queries --user-id 1 --chat-id 1
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from app.core.database import engine
+
+QUERIES = {
+    "ensure_chat_exists": (
+        "SELECT * FROM chats WHERE id = :chat_id"
+    ),
+    "ensure_chat_member": (
+        "SELECT * FROM chat_participants WHERE chat_id = :chat_id AND user_id = :user_id"
+    ),
+    "get_chat_messages (latest page)": (
+        "SELECT * FROM messages WHERE chat_id = :chat_id "
+        "ORDER BY created_at DESC, id DESC LIMIT 51"
+    ),
+    "get_chat_messages (before cursor)": (
+        "SELECT * FROM messages WHERE chat_id = :chat_id "
+        "AND (created_at, id) < (SELECT created_at, id FROM messages WHERE chat_id = :chat_id "
+        "ORDER BY created_at, id LIMIT 1 OFFSET 1000) "
+        "ORDER BY created_at DESC, id DESC LIMIT 51"
+    ),
+    "get_user_chats": (
+        "SELECT chats.id, CASE WHEN chats.is_group THEN chats.title "
+        "ELSE coalesce(nullif(other_user.name, ''), other_user.email, chats.title) END AS title, "
+        "chats.is_group, chats.message_count, chat_summaries.last_message_id, chat_summaries.last_message_at, "
+        "chat_summaries.last_sender_id, chat_summaries.preview, chat_participants.last_read_message_id, "
+        "CASE WHEN coalesce(chat_participants.last_read_message_id, 0) >= coalesce(chat_summaries.last_message_id, 0) "
+        "THEN 0 ELSE (SELECT count(*) FROM (SELECT messages.id FROM messages "
+        "WHERE messages.chat_id = chat_participants.chat_id "
+        "AND messages.id > coalesce(chat_participants.last_read_message_id, 0) LIMIT 100) AS unread) END "
+        "AS unread_count, "
+        "coalesce(chat_summaries.last_message_at, '1970-01-01 00:00:00+00') AS activity "
+        "FROM chat_participants JOIN chats ON chats.id = chat_participants.chat_id "
+        "LEFT OUTER JOIN chat_summaries ON chat_summaries.chat_id = chats.id "
+        "LEFT OUTER JOIN LATERAL (SELECT users.name, users.email FROM users "
+        "JOIN chat_participants AS other_participant ON other_participant.user_id = users.id "
+        "WHERE chats.is_group = false AND other_participant.chat_id = chats.id "
+        "AND other_participant.user_id != :user_id LIMIT 1) AS other_user ON true "
+        "WHERE chat_participants.user_id = :user_id "
+        "ORDER BY activity DESC, chats.id DESC LIMIT 51"
+    ),
+    "get_user_events": (
+        "SELECT * FROM events WHERE chat_id IN "
+        "(SELECT chat_id FROM chat_participants WHERE user_id = :user_id) ORDER BY id DESC"
+    ),
+    "get_friends": (
+        "SELECT friends.friendship_id, users.id, users.name, users.last_name, users.photo_url FROM users JOIN ("
+        "SELECT id AS friendship_id, high_user_id AS friend_id FROM friendships WHERE low_user_id = :user_id AND status = 'ACCEPTED' "
+        "UNION ALL SELECT id, low_user_id FROM friendships WHERE high_user_id = :user_id AND status = 'ACCEPTED'"
+        ") AS friends ON friends.friend_id = users.id ORDER BY users.id LIMIT 51"
+    ),
+    "get_incoming_requests": (
+        "SELECT friendships.id, users.id, users.name, users.last_name, users.photo_url "
+        "FROM friendships JOIN users ON users.id = friendships.sender_id "
+        "WHERE friendships.status = 'PENDING' AND friendships.receiver_id = :user_id "
+        "ORDER BY friendships.id DESC LIMIT 51"
+    ),
+}
+
+
+async def explain(user_id: int, chat_id: int):
+    params = {"user_id": user_id, "chat_id": chat_id}
+    async with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            result = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params)
+            print(f"=== {name}")
+            for row in result:
+                print(row[0])
+            print()
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--chat-id", type=int, required=True)
+    args = parser.parse_args()
+    asyncio.run(explain(args.user_id, args.chat_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Bulk-import chat history from an NDJSON or CSV file.
+
+Each record needs chat_id, sender_id and content; created_at is optional:
+
+    python -m scripts.import_messages history.ndjson --format ndjson
+"""
+import argparse
+import asyncio
+
+from app.core.database import engine
+from app.services.message_import_service import import_messages
+
+
+async def run(path: str, fmt: str, chunk_size: int | None):
+    with open(path, encoding="utf-8", newline="") as file:
+        report = await import_messages(file, fmt, chunk_size)
+    await engine.dispose()
+
+    print(f"imported={report['imported']} rejected={report['rejected']} "
+          f"elapsed={report['elapsed_seconds']}s rate={report['rows_per_second']} rows/s")
+    for error in report["errors"]:
+        print(error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--format", default="ndjson", choices=["ndjson", "csv"])
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.path, args.format, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()